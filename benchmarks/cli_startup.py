@@ -0,0 +1,64 @@
+"""
+Measure `migrator.cli` startup cost.
+
+Runs each scenario in a fresh interpreter several times and prints the median
+wall time, then the heaviest imports of `import migrator.cli` as reported by
+`python -X importtime`.
+
+    python benchmarks/cli_startup.py --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+	"interpreter": ["-c", "pass"],
+	"import migrator.cli": ["-c", "import migrator.cli"],
+	"cli --help": ["-m", "migrator.cli", "--help"],
+}
+
+
+def time_run(args, runs):
+	samples = []
+	for _ in range(runs):
+		t0 = time.perf_counter()
+		subprocess.run([sys.executable] + args, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+		samples.append((time.perf_counter() - t0) * 1000)
+	return statistics.median(samples), min(samples)
+
+
+def top_imports(n):
+	out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import migrator.cli"],
+		cwd=ROOT, capture_output=True, text=True, check=True).stderr
+	rows = []
+	for line in out.splitlines():
+		if not line.startswith("import time:") or "cumulative" in line:
+			continue
+		_, cumulative, name = line[len("import time:"):].split("|")
+		rows.append((int(cumulative), name.rstrip()))
+	return sorted(rows, reverse=True)[:n]
+
+
+def main():
+	p = argparse.ArgumentParser(description="Benchmark migrator CLI startup")
+	p.add_argument("--runs", type=int, default=10)
+	p.add_argument("--top", type=int, default=10, help="Heaviest imports to list")
+	args = p.parse_args()
+
+	print(f"{'scenario':<24}{'median ms':>12}{'min ms':>10}")
+	for name, cmd in SCENARIOS.items():
+		median, best = time_run(cmd, args.runs)
+		print(f"{name:<24}{median:>12.1f}{best:>10.1f}")
+	print()
+	print("Heaviest imports (cumulative us):")
+	for us, name in top_imports(args.top):
+		print(f"{us:>10}  {name}")
+
+
+if __name__ == "__main__":
+	main()
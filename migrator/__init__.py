@@ -5,6 +5,7 @@ __all__ = [
 	"schema_mapper",
 	"ddl_generator",
 	"loader",
+	"verify",
 	"connectors",
 ]
 __version__ = "0.1.0"
\ No newline at end of file
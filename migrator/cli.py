@@ -1,32 +1,23 @@
 from __future__ import annotations
 import argparse
+import os
+import socket
 import sys
+import time
+from contextlib import contextmanager, nullcontext
 from typing import List, Optional
 
-from .config import load_config
+from .config import load_config, oracle_targets
 from .log import setup_logger
 from .connectors.factory import create_connector
 from .schema_mapper import clean_table_or_field_name
 from .ddl_generator import create_table_statement_for_oracle
-from .loader import OracleLoader
+from .loader import OracleLoader, UpsertKeyError
 
-def migrate_table(config_path: str, table_arg: Optional[str], mode: str, dry_run: bool):
-	cfg = load_config(config_path)
-	logger = setup_logger()
-	oracle = cfg["oracle"]
-	sources = cfg["source"]
-
-	# Connector via factory (supports future types)
-	conn = create_connector(sources)
-
-	# Build Oracle loader
-	loader = OracleLoader(
-		#lib_dir=oracle["lib_dir"],
-		conn=oracle["conn"],
-		username=oracle["username"],
-		password=oracle["password"],
-	)
+# Keep module import cheap: --help and --test-connection must not load the data
+# stack. Fan-out, verification and work queue helpers are imported where they are used.
 
+def select_tables(sources: dict, table_arg: Optional[str]) -> List[dict]:
 	selected = []
 	for t in sources.get("tables", []):
 		if table_arg and clean_table_or_field_name(t.get("target_table", "")) != clean_table_or_field_name(table_arg):
@@ -34,73 +25,345 @@ def migrate_table(config_path: str, table_arg: Optional[str], mode: str, dry_run
 		selected.append(t)
 	if not selected:
 		raise SystemExit("No tables matched selection")
+	return selected
+
+def target_schema(target: dict, entry: dict) -> str:
+	# A per-target schema wins so one table list can be loaded into several schemas
+	return target.get("schema") or entry.get("schema", target.get("username"))
+
+def build_loader(target: dict) -> OracleLoader:
+	return OracleLoader(
+		#lib_dir=oracle["lib_dir"],
+		conn=target["conn"],
+		username=target["username"],
+		password=target["password"],
+	)
+
+def upsert_load(logger, name: str, loader: OracleLoader, schema: str, table: str, meta: dict, db_type: str, entry: dict):
+	def load(chunks):
+		rows_read, rows_merged, rows_deleted = loader.upsert(schema, table, meta, db_type, entry["key_columns"],
+			chunks, delete_missing=bool(entry.get("delete_missing", False)))
+		logger.info("Upsert on %s into %s.%s: merged=%d deleted=%d", name, schema, table, rows_merged, rows_deleted)
+		return rows_read, rows_merged
+	return load
+
+def apply_ddl(loader: OracleLoader, schema: str, table: str, ddl: str, mode: str, drop_before_load: bool):
+	if drop_before_load:
+		loader.maybe_drop(schema, table)
+	if mode in ("create", "replace"):
+		loader.create_table(ddl)
+	elif mode == "truncate":
+		loader.truncate_table(schema, table)
+
+@contextmanager
+def profiled(logger, profile_dir: Optional[str], interval: Optional[float], name: str):
+	"""Sample one table's migration; yields `stage(name)` to label its phases."""
+	if not profile_dir:
+		yield lambda stage: nullcontext()
+		return
+	from .profiler import DEFAULT_INTERVAL, SamplingProfiler
+	profiler = SamplingProfiler(interval or DEFAULT_INTERVAL)
+	with profiler:
+		yield profiler.stage
+	path = os.path.join(profile_dir, f"{clean_table_or_field_name(name)}.collapsed")
+	profiler.write_collapsed(path)
+	profiler.log_summary(logger, name)
+	logger.info("Profile written: %s", path)
+
+def migrate_table(config_path: str, table_arg: Optional[str], mode: str, dry_run: bool,
+		queue_chunks: Optional[int] = None, stall_timeout: Optional[float] = None,
+		profile_dir: Optional[str] = None, profile_interval: Optional[float] = None):
+	from .fanout import DEFAULT_QUEUE_CHUNKS, DEFAULT_STALL_TIMEOUT, TargetFeed, fan_out
+	queue_chunks = queue_chunks or DEFAULT_QUEUE_CHUNKS
+	stall_timeout = stall_timeout or DEFAULT_STALL_TIMEOUT
+	cfg = load_config(config_path)
+	logger = setup_logger()
+	targets = oracle_targets(cfg)
+	sources = cfg["source"]
+
+	# Connector via factory (supports future types)
+	conn = create_connector(sources)
+
+	# Build one Oracle loader per target
+	loaders = {t["name"]: build_loader(t) for t in targets}
+
+	selected = select_tables(sources, table_arg)
 
 	report = []
 	for entry in selected:
-		path = entry["path"]
-		schema = entry.get("schema", oracle.get("username"))
-		target_table = entry["target_table"]
-		drop_before_load = bool(entry.get("drop_before_load", False))
+		with profiled(logger, profile_dir, profile_interval, entry["target_table"]) as stage:
+			path = entry["path"]
+			target_table = entry["target_table"]
+			drop_before_load = bool(entry.get("drop_before_load", False))
 
-		logger.info("Processing table: path=%s schema=%s target=%s", path, schema, target_table)
-		meta = conn.get_table_metadata(path)
-		ddl = create_table_statement_for_oracle(meta, schema, target_table, db_type=sources.get('type'))
+			logger.info("Processing table: path=%s target=%s", path, target_table)
+			if mode == "upsert" and not entry.get("key_columns"):
+				raise SystemExit(f"--mode upsert requires key_columns for table {target_table}")
+			with stage("metadata"):
+				meta = conn.get_table_metadata(path)
 
-		logger.info("Generated DDL:\n%s", ddl)
+			feeds = []
+			for target in targets:
+				schema = target_schema(target, entry)
+				loader = loaders[target["name"]]
+				ddl = create_table_statement_for_oracle(meta, schema, target_table, db_type=sources.get('type'))
+				logger.info("Generated DDL for %s:\n%s", target["name"], ddl)
+				if dry_run:
+					continue
 
-		if dry_run:
-			# Sample first N rows
-			n = 10
-			it = conn.stream_rows(path, chunksize=n)
-			try:
-				sample = next(it)
-				logger.info("Sample rows (up to %d):\n%s", n, sample.head(n).to_string(index=False))
-			except StopIteration:
-				logger.info("No rows available in source")
-			report.append({"table": target_table, "rows_read": 0, "rows_inserted": 0})
-			continue
+				# Execute DDL actions
+				try:
+					with stage("ddl"):
+						apply_ddl(loader, schema, target_table, ddl, mode, drop_before_load)
+				except Exception as e:
+					if len(targets) == 1:
+						raise
+					logger.error("DDL failed on %s for %s.%s: %s", target["name"], schema, target_table, e)
+					report.append({"target": target["name"], "table": target_table, "rows_read": 0, "rows_inserted": 0, "error": str(e)})
+					continue
+				load = None
+				if mode == "upsert":
+					load = upsert_load(logger, target["name"], loader, schema, target_table, meta, sources.get("type"), entry)
+				feeds.append(TargetFeed(target["name"], loader, schema, target_table, queue_chunks, load))
 
-		# Execute DDL actions
-		if drop_before_load:
-			loader.maybe_drop(schema, target_table)
-		if mode in ("create", "replace"):
-			loader.create_table(ddl)
-		elif mode == "truncate":
-			loader.truncate_table(schema, target_table)
+			if dry_run:
+				# Sample first N rows
+				n = 10
+				it = conn.stream_rows(path, chunksize=n)
+				try:
+					with stage("read"):
+						sample = next(it)
+					logger.info("Sample rows (up to %d):\n%s", n, sample.head(n).to_string(index=False))
+				except StopIteration:
+					logger.info("No rows available in source")
+				report.append({"target": targets[0]["name"], "table": target_table, "rows_read": 0, "rows_inserted": 0, "error": None})
+				continue
 
-		# Load data
-		rows_read, rows_inserted = loader.bulk_insert(schema, target_table, conn.stream_rows(path))
-		logger.info("Load completed: read=%d inserted=%d", rows_read, rows_inserted)
-		report.append({"table": target_table, "rows_read": rows_read, "rows_inserted": rows_inserted})
+			# Load data
+			if len(targets) == 1:
+				feed = feeds[0]
+				try:
+					with stage("load"):
+						rows_read, rows_inserted = feed.load(conn.stream_rows(path))
+				except UpsertKeyError as e:
+					# Bad source keys fail this table only; the staged rows were rolled back
+					logger.error("%s", e)
+					report.append({"target": feed.name, "table": target_table, "rows_read": 0, "rows_inserted": 0, "error": str(e)})
+					continue
+				logger.info("Load completed: read=%d inserted=%d", rows_read, rows_inserted)
+				report.append({"target": feed.name, "table": target_table, "rows_read": rows_read, "rows_inserted": rows_inserted, "error": None})
+			elif feeds:
+				# Read the source once and load every target concurrently
+				with stage("read"):
+					results = fan_out(conn.stream_rows(path), feeds, stall_timeout)
+				for r in results:
+					logger.info("Load completed on %s: read=%d inserted=%d", r["target"], r["rows_read"], r["rows_inserted"])
+					report.append(r)
 
 	# Summary
 	logger.info("Summary report:")
 	for r in report:
-		logger.info("%s: read=%d inserted=%d", r["table"], r["rows_read"], r["rows_inserted"])
+		if len(targets) == 1:
+			logger.info("%s: read=%d inserted=%d", r["table"], r["rows_read"], r["rows_inserted"])
+		else:
+			logger.info("%s -> %s: read=%d inserted=%d%s", r["table"], r["target"], r["rows_read"], r["rows_inserted"],
+				f" FAILED: {r['error']}" if r["error"] else "")
+	return report
+
+def verify_load(config_path: str, table_arg: Optional[str], workers: int, chunk_rows: Optional[int] = None) -> bool:
+	from .verify import DEFAULT_CHUNK_ROWS, TableVerifier, verify_tables
+	chunk_rows = chunk_rows or DEFAULT_CHUNK_ROWS
+	cfg = load_config(config_path)
+	logger = setup_logger()
+	targets = oracle_targets(cfg)
+	sources = cfg["source"]
+	verifiers = {t["name"]: TableVerifier(build_loader(t)._connect) for t in targets}
+
+	jobs = []
+	for entry in select_tables(sources, table_arg):
+		# Column types are read by the hashing workers, in parallel across tables
+		jobs.append({
+			"path": entry["path"],
+			"target_table": entry["target_table"],
+			"targets": [(t["name"], verifiers[t["name"]], target_schema(t, entry)) for t in targets],
+			"key_columns": [clean_table_or_field_name(k) for k in entry.get("key_columns", [])],
+		})
+		if not entry.get("key_columns"):
+			logger.warning("No key_columns for %s; verifying whole-table hash only", entry["target_table"])
+
+	results = verify_tables(jobs, sources, workers=workers, chunk_rows=chunk_rows)
+
+	logger.info("Verification report:")
+	for r in results:
+		logger.info("%s -> %s: %s source=%d target=%d chunks=%d mismatched=%d", r["table"], r["target"], r["status"],
+			r["source_rows"], r["target_rows"], r["chunks"], r["mismatched_chunks"])
+		for d in r["diffs"]:
+			logger.info("  %s key=%s source_rows=%d target_rows=%d", d["kind"], d["key"], d["source_rows"], d["target_rows"])
+	return all(r["status"] == "ok" for r in results)
+
+def log_queue_report(logger, report: List[dict]):
+	logger.info("Summary report:")
+	for r in report:
+		logger.info("%s -> %s: read=%d inserted=%d units=%d workers=%s%s", r["table"], r["target"], r["rows_read"],
+			r["rows_inserted"], r["units"], ",".join(r["workers"]) or "-", f" FAILED: {r['error']}" if r["error"] else "")
+
+def coordinate(config_path: str, table_arg: Optional[str], mode: str, queue_path: str, split_rows: Optional[int] = None,
+		lease_seconds: Optional[float] = None, max_attempts: Optional[int] = None, wait: bool = True) -> List[dict]:
+	"""
+	Prepare the target tables and publish one work unit per table, record
+	range and target to `queue_path`; then wait for the workers and return
+	their merged report.
+	"""
+	from .connectors.archive import is_archived
+	from .workqueue import DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS, DEFAULT_POLL_SECONDS, WorkQueue
+	if mode == "upsert":
+		# Staging tables are per session, but an upsert is one MERGE over the whole
+		# source: per-range units would each run delete_missing and remove the
+		# rows that other ranges load
+		raise SystemExit("--mode upsert is not supported with --coordinate")
+	cfg = load_config(config_path)
+	logger = setup_logger()
+	targets = oracle_targets(cfg)
+	sources = cfg["source"]
+	conn = create_connector(sources)
+	queue = WorkQueue(queue_path)
+	if queue.settings() is not None:
+		raise SystemExit(f"Work queue {queue_path} already exists; remove it to start a new run")
+
+	units = []
+	for entry in select_tables(sources, table_arg):
+		path = entry["path"]
+		target_table = entry["target_table"]
+		meta = conn.get_table_metadata(path)
+		for target in targets:
+			schema = target_schema(target, entry)
+			ddl = create_table_statement_for_oracle(meta, schema, target_table, db_type=sources.get('type'))
+			logger.info("Generated DDL for %s:\n%s", target["name"], ddl)
+			apply_ddl(build_loader(target), schema, target_table, ddl, mode, bool(entry.get("drop_before_load", False)))
+
+		# Large files are split by physical record range where the connector can seek
+		ranges = [(None, None)]
+		if split_rows and hasattr(conn, "record_count") and is_archived(path):
+			# Every unit would decompress all records before its range: O(N^2) over the file
+			logger.info("Not splitting %s: archived sources cannot seek to a record range", path)
+		elif split_rows and hasattr(conn, "record_count"):
+			total = conn.record_count(path)
+			ranges = [(start, min(start + split_rows, total)) for start in range(0, total, split_rows)] or ranges
+		for start, stop in ranges:
+			for target in targets:
+				units.append({"table": target_table, "path": path, "target": target["name"],
+					"schema": target_schema(target, entry), "start": start, "stop": stop})
+
+	queue.create(units, lease_seconds or DEFAULT_LEASE_SECONDS, max_attempts or DEFAULT_MAX_ATTEMPTS)
+	logger.info("Published %d work units to %s", len(units), queue_path)
+	if not wait:
+		return []
+	while queue.remaining():
+		time.sleep(DEFAULT_POLL_SECONDS)
+	report = queue.report()
+	log_queue_report(logger, report)
+	return report
+
+def work(config_path: str, queue_path: str, worker_id: Optional[str] = None) -> int:
+	"""Load units from the queue at `queue_path` until none is left."""
+	from .workqueue import WorkQueue, run_worker
+	cfg = load_config(config_path)
+	logger = setup_logger()
+	conn = create_connector(cfg["source"])
+	loaders = {t["name"]: build_loader(t) for t in oracle_targets(cfg)}
+	worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+
+	def process(unit, lease):
+		if unit["start_rec"] is None:
+			chunks = conn.stream_rows(unit["path"])
+		else:
+			chunks = conn.stream_rows(unit["path"], start=unit["start_rec"], stop=unit["stop_rec"])
+		# Stop reading and roll back as soon as the unit may belong to another worker
+		return loaders[unit["target"]].bulk_insert(unit["schema_name"], unit["table_name"], lease.guard(chunks),
+			before_commit=lease.confirm)
+
+	done = run_worker(WorkQueue(queue_path), worker_id, process)
+	logger.info("Worker %s finished: %d units loaded", worker_id, done)
+	return done
+
+def prewarm_cache(config_path: str, table_arg: Optional[str]):
+	cfg = load_config(config_path)
+	logger = setup_logger()
+	sources = cfg["source"]
+	if not sources.get("cache"):
+		raise SystemExit("source.cache is not configured")
+	conn = create_connector(sources)
+	for entry in select_tables(sources, table_arg):
+		if conn.prewarm(entry["path"]):
+			logger.info("Cached %s", entry["path"])
+		else:
+			logger.info("Already cached: %s", entry["path"])
 
 def main(argv: Optional[List[str]] = None):
 	p = argparse.ArgumentParser(description="Migrate DBF/Paradox to Oracle")
 	p.add_argument("--config", required=True, help="Path to YAML config")
 	p.add_argument("--table", help="Target table name to migrate")
 	p.add_argument("--dry-run", action="store_true", help="Preview DDL and sample rows")
-	p.add_argument("--mode", choices=["append", "create", "truncate", "drop", "replace"], default="append", help="DDL/load mode")
+	p.add_argument("--mode", choices=["append", "create", "truncate", "drop", "replace", "upsert"], default="append", help="DDL/load mode")
 	p.add_argument("--test-connection", action="store_true", help="Test Oracle connection and exit")
+	p.add_argument("--verify", action="store_true", help="Compare loaded tables with their sources via chunked row hashes")
+	p.add_argument("--verify-workers", type=int, default=os.cpu_count() or 1, help="Parallel source hashing processes for --verify")
+	p.add_argument("--verify-chunk-rows", type=int, help="Source rows per hashed key range for --verify (default: 10000)")
+	p.add_argument("--fanout-queue-chunks", type=int, help="Chunks buffered per target when loading several oracle targets (default: 4)")
+	p.add_argument("--fanout-stall-timeout", type=float, help="Seconds a target may block the shared read before it is detached (default: 300)")
+	p.add_argument("--profile", nargs="?", const="profiles", metavar="DIR", help="Sample each table's stages; write <DIR>/<TABLE>.collapsed flame-graph stacks (default DIR: profiles)")
+	p.add_argument("--profile-interval", type=float, help="Sampling interval in ms for --profile (default: 10)")
+	p.add_argument("--prewarm-cache", action="store_true", help="Parse configured sources into source.cache and exit")
+	p.add_argument("--coordinate", metavar="QUEUE", help="Prepare target tables, publish work units to the shared QUEUE file and wait for workers")
+	p.add_argument("--worker", metavar="QUEUE", help="Claim and load work units from the shared QUEUE file until none is left")
+	p.add_argument("--worker-id", help="Worker name recorded in the queue (default: host:pid)")
+	p.add_argument("--split-rows", type=int, help="Split DBF sources into work units of this many records for --coordinate")
+	p.add_argument("--lease-seconds", type=float, help="Seconds a worker holds a unit without renewing it for --coordinate (default: 300)")
+	p.add_argument("--max-attempts", type=int, help="Attempts per work unit before it is failed for --coordinate (default: 3)")
+	p.add_argument("--no-wait", action="store_true", help="With --coordinate, exit once the units are published")
+	p.add_argument("--queue-report", metavar="QUEUE", help="Print the merged report of a work queue and exit")
 	args = p.parse_args(argv)
 
 	if args.test_connection:
 		cfg = load_config(args.config)
 		logger = setup_logger()
-		oracle = cfg["oracle"]
-		loader = OracleLoader(conn=oracle["conn"], username=oracle["username"], password=oracle["password"])
-		try:
-			loader.test_connection()
-			logger.info("Oracle connection successful.")
-			sys.exit(0)
-		except Exception as e:
-			logger.exception("Oracle connection failed: %s", e)
-			sys.exit(2)
-
-	migrate_table(args.config, args.table, args.mode, args.dry_run)
+		failed = False
+		for target in oracle_targets(cfg):
+			try:
+				build_loader(target).test_connection()
+				logger.info("Oracle connection successful: %s", target["name"])
+			except Exception as e:
+				logger.exception("Oracle connection failed: %s: %s", target["name"], e)
+				failed = True
+		sys.exit(2 if failed else 0)
+
+	if args.prewarm_cache:
+		prewarm_cache(args.config, args.table)
+		sys.exit(0)
+
+	if args.verify:
+		ok = verify_load(args.config, args.table, args.verify_workers, args.verify_chunk_rows)
+		sys.exit(0 if ok else 1)
+
+	if args.queue_report:
+		from .workqueue import WorkQueue
+		report = WorkQueue(args.queue_report).report()
+		log_queue_report(setup_logger(), report)
+		sys.exit(1 if any(r["error"] for r in report) else 0)
+
+	if args.worker:
+		work(args.config, args.worker, args.worker_id)
+		sys.exit(0)
+
+	if args.coordinate:
+		report = coordinate(args.config, args.table, args.mode, args.coordinate, args.split_rows,
+			args.lease_seconds, args.max_attempts, wait=not args.no_wait)
+		sys.exit(1 if any(r["error"] for r in report) else 0)
+
+	report = migrate_table(args.config, args.table, args.mode, args.dry_run, args.fanout_queue_chunks, args.fanout_stall_timeout,
+		args.profile, args.profile_interval / 1000 if args.profile_interval else None)
+	if any(r["error"] for r in report):
+		sys.exit(1)
 
 if __name__ == "__main__":
 	main()
@@ -16,15 +16,29 @@ def load_config(path: str) -> Dict[str, Any]:
 	# Basic validation
 	if "oracle" not in data:
 		raise ConfigError("Missing 'oracle' section in config")
-	oracle = data["oracle"]
-	for key in ["conn", "username", "password"]:
-		if key not in oracle or not oracle[key]:
-			raise ConfigError(f"oracle.{key} is required")
+	# `oracle` is a single target or a list of targets loaded from the same read
+	targets = data["oracle"] if isinstance(data["oracle"], list) else [data["oracle"]]
+	if not targets:
+		raise ConfigError("'oracle' must define at least one target")
+	names = set()
+	for i, oracle in enumerate(targets):
+		prefix = "oracle" if not isinstance(data["oracle"], list) else f"oracle[{i}]"
+		for key in ["conn", "username", "password"]:
+			if key not in oracle or not oracle[key]:
+				raise ConfigError(f"{prefix}.{key} is required")
+		oracle.setdefault("name", f"{oracle['username']}@{oracle['conn']}")
+		if oracle["name"] in names:
+			raise ConfigError(f"Duplicate oracle target name: {oracle['name']}")
+		names.add(oracle["name"])
 
 	sources = data.get("source", {})
 	if not sources:
 		raise ConfigError("Missing 'source' section in config")
 
+	cache = sources.get("cache")
+	if cache is not None and (not isinstance(cache, dict) or not cache.get("dir")):
+		raise ConfigError("source.cache.dir is required when source.cache is set")
+
 	# Normalize tables list
 	tables: List[Dict[str, Any]] = sources.get("tables", []) or []
 	for t in tables:
@@ -32,5 +46,12 @@ def load_config(path: str) -> Dict[str, Any]:
 			raise ConfigError("Each table entry must include 'path'")
 		if "target_table" not in t:
 			raise ConfigError("Each table entry must include 'target_table'")
+		if not isinstance(t.get("key_columns", []), list):
+			raise ConfigError("tables[].key_columns must be a list of column names")
 
 	return data
+
+
+def oracle_targets(cfg: Dict[str, Any]) -> List[Dict[str, Any]]:
+	oracle = cfg["oracle"]
+	return oracle if isinstance(oracle, list) else [oracle]
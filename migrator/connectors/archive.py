@@ -0,0 +1,310 @@
+from __future__ import annotations
+import bz2
+import gzip
+import io
+import lzma
+import os
+import queue
+import shutil
+import tarfile
+import tempfile
+import threading
+import zipfile
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, Optional, Tuple
+
+MEMBER_SEP = "!/"
+READ_BLOCK = 1024 * 1024
+READ_AHEAD_BLOCKS = 8
+DEFAULT_SPILL_MEMORY = 64 * 1024 * 1024
+
+# Single compressed files, e.g. TABLE.DBF.gz
+_COMPRESSED = {
+	".gz": gzip.open,
+	".xz": lzma.open,
+	".bz2": bz2.open,
+}
+_TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.xz", ".txz", ".tar.bz2", ".tbz2")
+_END = object()
+
+
+def split_member(path: str) -> Tuple[str, Optional[str]]:
+	"""`archive.zip!/DIR/TABLE.DBF` -> ("archive.zip", "DIR/TABLE.DBF"); plain paths get None."""
+	if MEMBER_SEP in path:
+		archive, member = path.split(MEMBER_SEP, 1)
+		return archive, member
+	return path, None
+
+
+def is_archived(path: str) -> bool:
+	archive, member = split_member(path)
+	return member is not None or os.path.splitext(archive)[1].lower() in _COMPRESSED
+
+
+def source_file(path: str) -> str:
+	"""The file on disk that holds `path`: the archive for members, else `path` itself."""
+	return split_member(path)[0]
+
+
+def companion_path(path: str, suffix: str) -> str:
+	"""
+	Path of a companion file (memo/blob) next to `path`, inside the same archive
+	for members: `a.zip!/T.DBF` -> `a.zip!/T.DBT`, `T.DBF.gz` -> `T.DBT.gz`.
+	"""
+	archive, member = split_member(path)
+	if member is not None:
+		return f"{archive}{MEMBER_SEP}{_swap_suffix(member, suffix)}"
+	stem, ext = os.path.splitext(archive)
+	if ext.lower() in _COMPRESSED:
+		return _swap_suffix(stem, suffix) + ext
+	return _swap_suffix(archive, suffix)
+
+
+def _swap_suffix(name: str, suffix: str) -> str:
+	stem, ext = os.path.splitext(name)
+	# Keep the case of the original extension (T.DBF -> T.DBT, t.dbf -> t.dbt)
+	return stem + (suffix.lower() if ext.islower() else suffix.upper())
+
+
+def _zip_member(zf: zipfile.ZipFile, member: str) -> zipfile.ZipInfo:
+	try:
+		return zf.getinfo(member)
+	except KeyError:
+		# Dumps made on Windows do not keep file name case consistent
+		for info in zf.infolist():
+			if info.filename.lower() == member.lower():
+				return info
+		raise FileNotFoundError(f"{member} not found in {zf.filename}")
+
+
+def _tar_name(name: str) -> str:
+	return (name[2:] if name.startswith("./") else name).lower()
+
+
+def _open_tar_member(archive: str, member: str) -> BinaryIO:
+	# Stream mode reads the archive front to back once, without seeking
+	tf = tarfile.open(archive, "r|*")
+	for info in tf:
+		if info.isfile() and _tar_name(info.name) == _tar_name(member):
+			fp = tf.extractfile(info)
+			return _Closing(fp, tf)
+	tf.close()
+	raise FileNotFoundError(f"{member} not found in {archive}")
+
+
+class _Closing(io.RawIOBase):
+	"""A member stream that also closes its archive."""
+	def __init__(self, fp, owner):
+		self.fp = fp
+		self.owner = owner
+
+	def readable(self):
+		return True
+
+	def readinto(self, b):
+		data = self.fp.read(len(b))
+		b[:len(data)] = data
+		return len(data)
+
+	def close(self):
+		if not self.closed:
+			self.fp.close()
+			self.owner.close()
+		super().close()
+
+
+def _open_raw(path: str) -> BinaryIO:
+	archive, member = split_member(path)
+	if member is None:
+		opener = _COMPRESSED.get(os.path.splitext(archive)[1].lower())
+		return opener(archive, "rb") if opener else open(archive, "rb")
+	if archive.lower().endswith(_TAR_SUFFIXES):
+		return _open_tar_member(archive, member)
+	zf = zipfile.ZipFile(archive)
+	try:
+		return _Closing(zf.open(_zip_member(zf, member)), zf)
+	except Exception:
+		zf.close()
+		raise
+
+
+def exists(path: str) -> bool:
+	if not is_archived(path):
+		return os.path.exists(path)
+	try:
+		_open_raw(path).close()
+		return True
+	except (FileNotFoundError, OSError, zipfile.BadZipFile, tarfile.TarError):
+		return False
+
+
+class ReadAhead(io.RawIOBase):
+	"""
+	Opens the stream returned by `opener` and decompresses it on a background
+	thread into a bounded queue of blocks, so inflating the next blocks overlaps
+	with parsing the current one (zlib and lzma release the GIL while they work).
+	Opening happens on that thread too: finding a tar member means decompressing
+	every member before it, which then overlaps with the caller's work instead
+	of blocking it.
+	"""
+	def __init__(self, opener: Callable[[], BinaryIO], block_size: int = READ_BLOCK, depth: int = READ_AHEAD_BLOCKS):
+		self.opener = opener
+		self.raw: Optional[BinaryIO] = None
+		self.block_size = block_size
+		self.blocks: "queue.Queue[object]" = queue.Queue(maxsize=depth)
+		self.pending = memoryview(b"")
+		self._stop = threading.Event()
+		self._eof = False
+		self._error: Optional[Exception] = None
+		self._thread = threading.Thread(target=self._run, name="read-ahead", daemon=True)
+		self._thread.start()
+
+	def _put(self, item) -> bool:
+		while not self._stop.is_set():
+			try:
+				self.blocks.put(item, timeout=0.5)
+				return True
+			except queue.Full:
+				continue
+		return False
+
+	def _run(self):
+		try:
+			self.raw = self.opener()
+			while not self._stop.is_set():
+				data = self.raw.read(self.block_size)
+				if not data:
+					break
+				if not self._put(data):
+					return
+			self._put(_END)
+		except Exception as e:
+			self._put(e)
+
+	def readable(self):
+		return True
+
+	def readinto(self, b):
+		while not self.pending and not self._eof:
+			# The producer sends END or an error once; keep them for later reads
+			if self._error is not None:
+				raise self._error
+			item = self.blocks.get()
+			if item is _END:
+				self._eof = True
+			elif isinstance(item, Exception):
+				self._error = item
+				raise item
+			else:
+				self.pending = memoryview(item)
+		n = min(len(b), len(self.pending))
+		b[:n] = self.pending[:n]
+		self.pending = self.pending[n:]
+		return n
+
+	def close(self):
+		if not self.closed:
+			self._stop.set()
+			self._thread.join()
+			if self.raw is not None:
+				self.raw.close()
+		super().close()
+
+
+def open_stream(path: str) -> BinaryIO:
+	"""
+	Open `path` for sequential reading. Plain files are opened directly;
+	archive members and compressed files are decompressed ahead of the reader.
+	"""
+	if not is_archived(path):
+		return open(path, "rb")
+	return io.BufferedReader(ReadAhead(lambda: _open_raw(path)), buffer_size=READ_BLOCK)
+
+
+class SpillFile(io.RawIOBase):
+	"""
+	Seekable view of a sequential stream for formats that need random access
+	(DBT memo blocks). Bytes are copied from the stream only as far as the
+	furthest read so far, into a spool that stays in memory up to
+	`max_memory` bytes and then spills to a temporary file.
+	"""
+	def __init__(self, stream: BinaryIO, max_memory: int = DEFAULT_SPILL_MEMORY):
+		self.stream = stream
+		self.spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+		self.filled = 0
+		self.pos = 0
+		self._eof = False
+
+	def readable(self):
+		return True
+
+	def seekable(self):
+		return True
+
+	def seek(self, offset, whence=io.SEEK_SET):
+		if whence == io.SEEK_SET:
+			self.pos = offset
+		elif whence == io.SEEK_CUR:
+			self.pos += offset
+		else:
+			self._fill(None)
+			self.pos = self.filled + offset
+		return self.pos
+
+	def tell(self):
+		return self.pos
+
+	def _fill(self, upto: Optional[int]):
+		self.spool.seek(self.filled)
+		while not self._eof and (upto is None or self.filled < upto):
+			data = self.stream.read(READ_BLOCK)
+			if not data:
+				self._eof = True
+				break
+			self.spool.write(data)
+			self.filled += len(data)
+
+	def readinto(self, b):
+		self._fill(self.pos + len(b))
+		self.spool.seek(self.pos)
+		n = self.spool.readinto(b)
+		self.pos += n
+		return n
+
+	def close(self):
+		if not self.closed:
+			self.stream.close()
+			self.spool.close()
+		super().close()
+
+
+def open_random(path: str, max_memory: int = DEFAULT_SPILL_MEMORY) -> BinaryIO:
+	"""Open `path` for random access; archive members go through a SpillFile."""
+	if not is_archived(path):
+		return open(path, "rb")
+	return io.BufferedReader(SpillFile(open_stream(path), max_memory))
+
+
+@contextmanager
+def local_copy(path: str, companion_suffixes=()) -> Iterator[str]:
+	"""
+	Yield a file system path for `path`, for libraries that can only open
+	files by name (pxlib). Archive members and their companions are
+	extracted to a temporary directory that is removed afterwards.
+	"""
+	if not is_archived(path):
+		yield path
+		return
+	tmp = tempfile.mkdtemp(prefix="pymigrator-")
+	try:
+		archive, member = split_member(path)
+		name = os.path.basename(member if member is not None else os.path.splitext(archive)[0])
+		local = os.path.join(tmp, name)
+		for src, dst in [(path, local)] + [(companion_path(path, s), _swap_suffix(local, s)) for s in companion_suffixes]:
+			if src != path and not exists(src):
+				continue
+			with open_stream(src) as fin, open(dst, "wb") as fout:
+				shutil.copyfileobj(fin, fout, READ_BLOCK)
+		yield local
+	finally:
+		shutil.rmtree(tmp, ignore_errors=True)
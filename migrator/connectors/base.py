@@ -1,6 +1,7 @@
 from __future__ import annotations
-from typing import Dict, Iterator, List, Any, Optional, Protocol
-import pandas as pd
+from typing import TYPE_CHECKING, Dict, Iterator, List, Any, Optional, Protocol
+if TYPE_CHECKING:
+	import pandas as pd
 
 
 # migrator/connectors/base.py
@@ -10,3 +11,12 @@ class BaseConnector(Protocol):
 	def stream_rows(self, path: str, chunksize: int = 5000) -> Iterator[pd.DataFrame]:
 		...  # add path param to match usage
 
+
+
+def describe_table(connector: BaseConnector, path: str) -> Dict[str, Any]:
+	"""
+	Column metadata for `path`, from the connector's header-only `describe()`
+	where it has one; row_count may then be None.
+	"""
+	describe = getattr(connector, "describe", None)
+	return describe(path) if describe else connector.get_table_metadata(path)
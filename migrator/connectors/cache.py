@@ -0,0 +1,264 @@
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+from .archive import is_archived, source_file
+from .base import BaseConnector, describe_table
+if TYPE_CHECKING:
+	import pandas as pd
+
+logger = logging.getLogger("migrator")
+
+DEFAULT_MAX_SIZE_MB = 10240
+_HEADER_BYTES = 65536
+
+
+class CacheError(Exception):
+	pass
+
+
+def _require_pyarrow():
+	try:
+		import pyarrow as pa
+		import pyarrow.ipc  # noqa: F401
+	except ImportError as e:
+		raise CacheError("source.cache requires pyarrow (pip install pyarrow)") from e
+	return pa
+
+
+class SourceCache:
+	"""
+	Local Arrow IPC cache of parsed source tables.
+
+	Entries are keyed by the source fingerprint (size, mtime and header bytes of
+	the file and its companion memo/blob files) plus the connector's
+	`cache_version`, so re-exported dumps or parser changes never hit stale data.
+	Each entry is `<key>.arrow` with a `<key>.json` sidecar holding the table
+	metadata. Reads memory-map the IPC file, so chunks are zero-copy slices.
+	"""
+	def __init__(self, cache_dir: str, max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+		self.cache_dir = cache_dir
+		self.max_bytes = int(max_size_mb) * 1024 * 1024
+		os.makedirs(cache_dir, exist_ok=True)
+
+	def key(self, connector: BaseConnector, path: str) -> str:
+		h = hashlib.sha256()
+		h.update(type(connector).__name__.encode())
+		h.update(str(getattr(connector, "cache_version", "0")).encode())
+		h.update(os.path.abspath(path).encode("utf-8"))
+		if is_archived(path):
+			# Archive members: fingerprint the archive file itself, which holds the companions too
+			files = [source_file(path)]
+		else:
+			stem, _ = os.path.splitext(path)
+			files = [path] + [stem + s for s in getattr(connector, "companion_suffixes", ())]
+		for f in files:
+			if not os.path.exists(f):
+				continue
+			st = os.stat(f)
+			h.update(f"{os.path.basename(f)}:{st.st_size}:{st.st_mtime_ns}".encode("utf-8"))
+			with open(f, "rb") as fp:
+				h.update(fp.read(_HEADER_BYTES))
+		return h.hexdigest()
+
+	def _paths(self, key: str):
+		base = os.path.join(self.cache_dir, key)
+		return base + ".arrow", base + ".json"
+
+	def get_metadata(self, key: str) -> Optional[Dict[str, Any]]:
+		data_path, meta_path = self._paths(key)
+		if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+			return None
+		with open(meta_path, "r", encoding="utf-8") as f:
+			return json.load(f)
+
+	def read(self, key: str, chunksize: int) -> Iterator[pd.DataFrame]:
+		pa = _require_pyarrow()
+		data_path, _ = self._paths(key)
+		os.utime(data_path)  # mark as recently used for eviction
+		with pa.memory_map(data_path, "r") as source:
+			table = pa.ipc.open_file(source).read_all()
+			for batch in table.to_batches(max_chunksize=chunksize):
+				yield batch.to_pandas()
+
+	def writer(self, key: str) -> "CacheWriter":
+		return CacheWriter(self, key)
+
+	def commit(self, key: str, tmp: str, meta: Dict[str, Any]):
+		data_path, meta_path = self._paths(key)
+		os.replace(tmp, data_path)
+		with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+			json.dump(meta, f, default=str)
+		os.replace(meta_path + ".tmp", meta_path)
+		self.evict()
+
+	def entries(self) -> List[Dict[str, Any]]:
+		out = []
+		for name in os.listdir(self.cache_dir):
+			if not name.endswith(".arrow"):
+				continue
+			p = os.path.join(self.cache_dir, name)
+			st = os.stat(p)
+			out.append({"key": name[:-len(".arrow")], "size": st.st_size, "used": st.st_mtime})
+		return out
+
+	def evict(self):
+		"""Drop least recently used entries until the cache fits `max_bytes`."""
+		entries = sorted(self.entries(), key=lambda e: e["used"])
+		total = sum(e["size"] for e in entries)
+		while entries and total > self.max_bytes:
+			e = entries.pop(0)
+			for p in self._paths(e["key"]):
+				if os.path.exists(p):
+					os.remove(p)
+			total -= e["size"]
+			logger.info("Evicted cache entry %s (%d bytes)", e["key"], e["size"])
+
+
+class CacheWriter:
+	"""
+	Writes one cache entry batch by batch to a temporary IPC file, so filling
+	the cache never holds more than the current batch. The file takes the schema
+	of the first batch; later batches are cast to it. If a batch needs a wider
+	type (an all-NULL column that later gets values, ints that turn into floats),
+	the batches written so far are copied into a new file with the unified schema.
+	"""
+	def __init__(self, cache: SourceCache, key: str):
+		self.pa = _require_pyarrow()
+		self.cache = cache
+		self.key = key
+		self.rows = 0
+		self.tmp: Optional[str] = None
+		self.schema = None
+		self._sink = None
+		self._writer = None
+
+	def _open(self, schema):
+		fd, self.tmp = tempfile.mkstemp(dir=self.cache.cache_dir, suffix=".tmp")
+		os.close(fd)
+		self.schema = schema
+		self._sink = self.pa.OSFile(self.tmp, "wb")
+		self._writer = self.pa.ipc.new_file(self._sink, schema)
+
+	def _close(self):
+		if self._writer is not None:
+			self._writer.close()
+			self._writer = None
+		if self._sink is not None:
+			self._sink.close()
+			self._sink = None
+
+	def _widen(self, schema):
+		"""Copy the batches written so far into a new file with `schema`."""
+		pa = self.pa
+		self._close()
+		old = self.tmp
+		self._open(schema)
+		try:
+			with pa.memory_map(old, "r") as source:
+				reader = pa.ipc.open_file(source)
+				for i in range(reader.num_record_batches):
+					self._writer.write_table(_conform(pa, pa.Table.from_batches([reader.get_batch(i)]), schema))
+		finally:
+			os.remove(old)
+
+	def append(self, df: pd.DataFrame):
+		pa = self.pa
+		table = pa.Table.from_pandas(df, preserve_index=False)
+		table = table.replace_schema_metadata(None)
+		if self._writer is None:
+			self._open(table.schema)
+		elif not table.schema.equals(self.schema):
+			schema = pa.unify_schemas([self.schema, table.schema], promote_options="permissive")
+			if not schema.equals(self.schema):
+				self._widen(schema)
+		self._writer.write_table(_conform(pa, table, self.schema))
+		self.rows += len(df)
+
+	def commit(self, meta: Dict[str, Any]):
+		if self._writer is None:
+			self._open(self.pa.schema([]))
+		self._close()
+		self.cache.commit(self.key, self.tmp, meta)
+		self.tmp = None
+
+	def abort(self):
+		self._close()
+		if self.tmp is not None and os.path.exists(self.tmp):
+			os.remove(self.tmp)
+		self.tmp = None
+
+
+def _conform(pa, table, schema):
+	"""`table` with the columns and types of `schema`; missing columns become NULL."""
+	columns = [
+		table.column(f.name).cast(f.type) if f.name in table.column_names else pa.nulls(len(table), f.type)
+		for f in schema
+	]
+	return pa.Table.from_arrays(columns, schema=schema)
+
+
+class CachedConnector(BaseConnector):
+	"""Wraps a connector and serves parsed tables from a SourceCache."""
+	def __init__(self, inner: BaseConnector, cache: SourceCache):
+		self.inner = inner
+		self.cache = cache
+		self.root_dir = getattr(inner, "root_dir", None)
+		self._parsed_meta: Dict[str, Dict[str, Any]] = {}
+
+	def get_table_metadata(self, path) -> Dict[str, Any]:
+		key = self.cache.key(self.inner, path)
+		meta = self.cache.get_metadata(key)
+		if meta is None:
+			# Remember it so a following cache fill does not parse the file again
+			meta = self._parsed_meta.get(key) or self.inner.get_table_metadata(path)
+			self._parsed_meta[key] = meta
+		return meta
+
+	def describe(self, path) -> Dict[str, Any]:
+		key = self.cache.key(self.inner, path)
+		return self.cache.get_metadata(key) or self._parsed_meta.get(key) or describe_table(self.inner, path)
+
+	def _fill_metadata(self, key: str, path, rows: int) -> Dict[str, Any]:
+		# --prewarm-cache and --verify: the header is enough, the rows were just counted
+		meta = self._parsed_meta.pop(key, None) or describe_table(self.inner, path)
+		return dict(meta, row_count=rows)
+
+	def stream_rows(self, path, chunksize: int = 5000) -> Iterator[pd.DataFrame]:
+		key = self.cache.key(self.inner, path)
+		if self.cache.get_metadata(key) is not None:
+			logger.info("Reading %s from cache entry %s", path, key)
+			yield from self.cache.read(key, chunksize)
+			return
+		writer: Optional[CacheWriter] = self.cache.writer(key)
+		try:
+			for df in self.inner.stream_rows(path, chunksize=chunksize):
+				if writer is not None:
+					try:
+						writer.append(df)
+					except Exception as e:
+						logger.warning("Could not cache %s: %s", path, e)
+						writer.abort()
+						writer = None
+				yield df
+			# Only reached when the source was consumed to the end
+			if writer is not None:
+				try:
+					writer.commit(self._fill_metadata(key, path, writer.rows))
+					logger.info("Cached %s as %s", path, key)
+				except Exception as e:
+					logger.warning("Could not cache %s: %s", path, e)
+		finally:
+			if writer is not None:
+				writer.abort()
+
+	def prewarm(self, path) -> bool:
+		"""Populate the cache for `path`; returns False if it was already cached."""
+		if self.cache.get_metadata(self.cache.key(self.inner, path)) is not None:
+			return False
+		for _ in self.stream_rows(path):
+			pass
+		return True
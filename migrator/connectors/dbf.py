@@ -1,20 +1,22 @@
 from __future__ import annotations
 from typing import Dict, Iterator, List, Any, Optional
 import os
-from dbfread import DBF
 import pandas as pd
 from .base import BaseConnector
-from .parsers import ParseDBFb
+from .parsers import ParseDBFb, dbf_record_count
 
 GREEK_ENCODING = 'cp737'
 
 class DBFConnector(BaseConnector):
+	# Bump when ParseDBFb output changes so cached tables are re-parsed
+	cache_version = "1"
+	companion_suffixes = (".DBT",)
+
 	def __init__(self, root_dir: Optional[str] = None):
 		self.root_dir = root_dir
 		
 
-	def get_table_metadata(self, path) -> Dict[str, Any]:
-		parser = ParseDBFb(path, GREEK_ENCODING)
+	def _metadata(self, parser: ParseDBFb, row_count: Optional[int]) -> Dict[str, Any]:
 		columns: List[Dict[str, Any]] = []
 		for field in parser.metadata:
 			columns.append({
@@ -26,13 +28,27 @@ class DBFConnector(BaseConnector):
 		return {
 			"table_name": os.path.splitext(parser.path)[0],
 			"columns": columns,
-			"row_count": len(parser.data),
+			"row_count": row_count,
 		}
 
-	def stream_rows(self, path, chunksize: int = 5000) -> Iterator[pd.DataFrame]:
+	def get_table_metadata(self, path) -> Dict[str, Any]:
 		parser = ParseDBFb(path, GREEK_ENCODING)
+		return self._metadata(parser, len(parser.data))
+
+	def describe(self, path) -> Dict[str, Any]:
+		"""Metadata from the header alone; row_count is left to the caller."""
+		parser = ParseDBFb(path, GREEK_ENCODING, stream=True)
+		parser.close()
+		return self._metadata(parser, None)
+
+	def record_count(self, path) -> int:
+		return dbf_record_count(path)
+
+	def stream_rows(self, path, chunksize: int = 5000, start: int = 0, stop: Optional[int] = None) -> Iterator[pd.DataFrame]:
+		"""Stream rows; `start`/`stop` limit parsing to physical records [start, stop)."""
+		parser = ParseDBFb(path, GREEK_ENCODING, start, stop, stream=True)
 		batch = []
-		for rec in parser.data:
+		for rec in parser.iterRecords():
 			col_mapper = lambda x: x[0]
 			dict_rec = dict(zip(map(col_mapper, parser.metadata), rec))
 			batch.append(dict_rec)
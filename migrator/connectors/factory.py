@@ -1,10 +1,44 @@
 from __future__ import annotations
-from typing import Any, Dict
+import importlib
+from typing import Any, Dict, Type
 
-from .dbf import DBFConnector
-from .paradox import ParadoxConnector
 from .base import BaseConnector
 
+ENTRY_POINT_GROUP = "pymigrator.connectors"
+
+# Connector type -> "module:Class". Modules are imported on first use so a run
+# only loads the parser stack (pandas, bitstring, pypxlib, ...) it needs, and a
+# missing native pxlib does not break DBF-only runs.
+_REGISTRY: Dict[str, str] = {
+	"dbf": "migrator.connectors.dbf:DBFConnector",
+	"paradox": "migrator.connectors.paradox:ParadoxConnector",
+	"sybase": "migrator.connectors.sybase:SybaseConnector",
+}
+
+
+def register_connector(connector_type: str, target: str):
+	"""Register a connector class by "module:Class" path under `connector_type`."""
+	_REGISTRY[connector_type.strip().lower()] = target
+
+
+def _entry_point_target(connector_type: str):
+	from importlib.metadata import entry_points
+	eps = entry_points()
+	group = eps.select(group=ENTRY_POINT_GROUP) if hasattr(eps, "select") else eps.get(ENTRY_POINT_GROUP, [])
+	for ep in group:
+		if ep.name.strip().lower() == connector_type:
+			return ep.value
+	return None
+
+
+def resolve_connector(connector_type: str) -> Type[BaseConnector]:
+	target = _REGISTRY.get(connector_type) or _entry_point_target(connector_type)
+	if target is None:
+		raise ValueError(f"Unsupported connector type: {connector_type}")
+	_REGISTRY[connector_type] = target
+	module_name, _, attr = target.partition(":")
+	return getattr(importlib.import_module(module_name), attr)
+
 
 def create_connector(sources_cfg: Dict[str, Any]) -> BaseConnector:
 	"""
@@ -13,6 +47,12 @@ def create_connector(sources_cfg: Dict[str, Any]) -> BaseConnector:
 	Backwards compatible behavior:
 	- If `type` is omitted and `root_dir` is present, use DBF connector.
 	- If `type` is "dbf", expect `root_dir` (optional if table paths are absolute).
+
+	Types not built in are looked up in the `pymigrator.connectors` entry point
+	group; plugins register `name = "package.module:ConnectorClass"`.
+
+	When a `cache` section is present (`dir`, optional `max_size_mb`), the
+	connector is wrapped so parsed tables are served from the local cache.
 	"""
 	connector_type = (sources_cfg.get("type") or "").strip().lower()
 	if not connector_type:
@@ -22,11 +62,16 @@ def create_connector(sources_cfg: Dict[str, Any]) -> BaseConnector:
 		else:
 			raise ValueError("Unable to infer connector type. Please set sources.type, e.g., 'dbf'.")
 
-	if connector_type == "dbf":
-		return DBFConnector(root_dir=sources_cfg.get("root_dir"))
-	elif connector_type == "paradox":
-		return ParadoxConnector(root_dir=sources_cfg.get("root_dir"))
-
-	raise ValueError(f"Unsupported connector type: {connector_type}")
-
+	cls = resolve_connector(connector_type)
+	# Connectors needing more than root_dir (e.g. database sources) build themselves
+	if hasattr(cls, "from_config"):
+		connector: BaseConnector = cls.from_config(sources_cfg)
+	else:
+		connector = cls(root_dir=sources_cfg.get("root_dir"))
 
+	cache_cfg = sources_cfg.get("cache")
+	if cache_cfg and cache_cfg.get("enabled", True) and getattr(connector, "cacheable", True):
+		from .cache import CachedConnector, SourceCache, DEFAULT_MAX_SIZE_MB
+		cache = SourceCache(cache_cfg["dir"], cache_cfg.get("max_size_mb", DEFAULT_MAX_SIZE_MB))
+		connector = CachedConnector(connector, cache)
+	return connector
@@ -53,11 +53,18 @@ import os
 import struct
 import bitstring
 import datetime
+from .archive import companion_path, open_random, open_stream
 
 class ParseDBFb:
-    def __init__(self, path, encoding):
+    def __init__(self, path, encoding, start=0, stop=None, stream=False):
         self.path = path
         self.encoding = encoding
+        # Physical record range [start, stop) to parse; the default is the whole file
+        self.start = start
+        self.stop = stop
+        # stream=True: read only the header here and yield rows from iterRecords()
+        self.stream = stream
+        self.fp = None
         self.memo_block_size = 512 # Default value
         self.memo_field_exists = False
         self.memo_biggest_size = 0
@@ -70,25 +77,39 @@ class ParseDBFb:
             self.parseDBFMetadata()
             if self.memo_field_exists:
                 self.openDBT()
-            self.parseDBFData()
-            if self.memofp is not None:
-                self.memofp.close()
+            if not self.stream:
+                self.parseDBFData()
+                if self.memofp is not None:
+                    self.memofp.close()
     
     def openDBF(self):
+        # open_stream decompresses archive members (a.zip!/T.DBF, T.DBF.gz) on the fly
         self.buffer = bytes([])
         try:
-            with open(self.path, 'rb') as fp:
-                self.buffer = fp.read()
+            if not self.stream:
+                with open_stream(self.path) as fp:
+                    self.buffer = fp.read()
+            else:
+                # Only the header is buffered; records are read as they are parsed
+                self.fp = open_stream(self.path)
+                head = self.fp.read(12)
+                nbh = struct.unpack('<h', head[8:10])[0]
+                self.buffer = head + self.fp.read(nbh - 12)
         except Exception as err:
             print(str(err))
         
     def openDBT(self):
         try:
-            self.memofp = open(self.path.replace('.DBF','.DBT'), 'rb')
+            # Memo blocks need random access; archived .DBT files go through a spill cache
+            self.memofp = open_random(companion_path(self.path, '.DBT'))
             bf = self.memofp.read(22)
             self.memo_block_size = struct.unpack('h',bf[20:22])[0]
         except Exception as err:
             print('Cannot open .DBT file!\n')
+            # Read memos as missing, as for a plain .DBF without its .DBT
+            if self.memofp is not None:
+                self.memofp.close()
+                self.memofp = None
     
     def parseDBFInfo(self):
         try:
@@ -136,100 +157,149 @@ class ParseDBFb:
     def parseDBFData(self):
         try:
             self.data = []
-            pos = self.nbh
-            for rn in range(0,self.nrt):
+            pos = self.nbh + self.start * self.nbr
+            stop = self.nrt if self.stop is None else min(self.stop, self.nrt)
+            for rn in range(self.start, stop):
                 rec = self.buffer[pos:pos+self.nbr]
                 deleted_flag = rec[0:1]
                 if deleted_flag == b'*':
                     self.nrt_deleted += 1 # Άθροισε τις διαγραμμένες εγγραφές
                 if deleted_flag == b' ': # Παρακάμπτω τις διαγραμμένες εγγραφές που δεν αρχίζουν με κενό αλλά με '*'
-                    fld_index = 1
-                    row_tuple = ()
-                    for column in self.metadata:
-                        """
-                        http://www.alexnolan.net/software/dbf.htm
-                        Autoincrement column, ακέραιος τεσσέρων bytes
-                        Το πρόγραμμα DBFPlus.exe σε autoincrement αρχίζει και αριθμεί τις εγγραφές από 1, 2, 3 κλπ και δεν ξέρω τι ακριβώς κάνει.
-                        Το buffer των τεσσάρων bytes αρχίζει πάντα από b'\x80' (Ο χαρακτήρας 128, του Euro €)
-                        Το παραγόμενο αποτέλεσμα και με τους τρεις τρόπους είναι το ίδιο
-                        """
-                        match column[1]:
-                            case '+': # Autoincrement
-                                fb = rec[fld_index:fld_index+column[2]]
-                                fb = bytes([fb[3],fb[2],fb[1],fb[1]]) # Για να πάρω αυτό που μου δίνει το DBFViewer Plus πρέπει να απαλείψω το \x80 και να γυρίσω τα bytes ανάποδα ???
-                                fv, = struct.unpack('<i',fb)
-                                #fv = int(fb[::-1].hex(), 16)
-                                #fv = int.from_bytes(fb, byteorder='little', signed=False)
-                                #print(fb, fv)
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case 'L': # Logical
-                                fv, = rec[fld_index:fld_index+column[2]].decode('latin')
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case 'N': # Numeric
-                                fv = rec[fld_index:fld_index+column[2]].decode('latin').strip('\x00').strip()
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case 'C': # Character
-                                fv = rec[fld_index:fld_index+column[2]].decode(self.encoding).strip('\x00').strip()
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case 'D': # Date
-                                fv_raw = rec[fld_index:fld_index+column[2]].decode('latin').strip('\x00').strip()
-                                if fv_raw and len(fv_raw) == 8 and fv_raw.isdigit():
-                                    y = int(fv_raw[0:4]); m = int(fv_raw[4:6]); d = int(fv_raw[6:8])
-                                    fv = datetime.date(y, m, d)
-                                else:
-                                    fv = None
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case '@': # Timestamp
-                                fb = rec[fld_index:fld_index+column[2]]
-                                fv = datetime.date(int(fb[:4]), int(fb[4:6]), int(fb[6:8]))
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case 'I': # Long
-                                fv, = struct.unpack('<i',rec[fld_index:fld_index+column[2]])
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case 'F': # Float
-                                fb = rec[fld_index:fld_index+column[2]].strip().strip(b'*')
-                                if fb:
-                                    fv = float(fb)
-                                    row_tuple += (fv,)
-                                    fld_index += column[2]
-                                else:
-                                    fv = None
-                            case 'O': # Double
-                                fv, = struct.unpack('<d',rec[fld_index:fld_index+column[2]])
-                                row_tuple += (fv,)
-                                fld_index += column[2]
-                            case c if c in ['M', 'B']: # Memo / Binary
-                                mids = rec[fld_index:fld_index+self.memo_block_number_size].decode('latin').strip()
-                                if mids != '':
-                                    fv = self.readMemo(int(mids))
-                                    if fv is not None:
-                                        fv = fv.decode(self.encoding)
-                                        fvs = len(fv)
-                                        if fvs > self.metadata[column[5]-1][2]:  # Ενημερώνω το max memo size
-                                            self.metadata[column[5]-1][2] = fvs
-                                    else:
-                                        fv = ''
-                                else:
-                                    fv = ''
-                                row_tuple += (fv,)
-                                fld_index += self.memo_block_number_size
-                            case _:
-                                print(f'Unknown data type: {column[1]}!')
-                                break
-                    
-                    self.data.append(row_tuple) # Append μόνο αν δεν είναι deleted
+                    self.data.append(self.parseRecord(rec)) # Append μόνο αν δεν είναι deleted
                 
                 pos += self.nbr # Shift πάντα και σε διαγραμμένες εγγραφές
         except Exception as err:
             print(str(err))
 
+    def parseRecord(self, rec):
+        fld_index = 1
+        row_tuple = ()
+        for column in self.metadata:
+            """
+            http://www.alexnolan.net/software/dbf.htm
+            Autoincrement column, ακέραιος τεσσέρων bytes
+            Το πρόγραμμα DBFPlus.exe σε autoincrement αρχίζει και αριθμεί τις εγγραφές από 1, 2, 3 κλπ και δεν ξέρω τι ακριβώς κάνει.
+            Το buffer των τεσσάρων bytes αρχίζει πάντα από b'\x80' (Ο χαρακτήρας 128, του Euro €)
+            Το παραγόμενο αποτέλεσμα και με τους τρεις τρόπους είναι το ίδιο
+            """
+            match column[1]:
+                case '+': # Autoincrement
+                    fb = rec[fld_index:fld_index+column[2]]
+                    fb = bytes([fb[3],fb[2],fb[1],fb[1]]) # Για να πάρω αυτό που μου δίνει το DBFViewer Plus πρέπει να απαλείψω το \x80 και να γυρίσω τα bytes ανάποδα ???
+                    fv, = struct.unpack('<i',fb)
+                    #fv = int(fb[::-1].hex(), 16)
+                    #fv = int.from_bytes(fb, byteorder='little', signed=False)
+                    #print(fb, fv)
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case 'L': # Logical
+                    fv, = rec[fld_index:fld_index+column[2]].decode('latin')
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case 'N': # Numeric
+                    fv = rec[fld_index:fld_index+column[2]].decode('latin').strip('\x00').strip()
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case 'C': # Character
+                    fv = rec[fld_index:fld_index+column[2]].decode(self.encoding).strip('\x00').strip()
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case 'D': # Date
+                    fv_raw = rec[fld_index:fld_index+column[2]].decode('latin').strip('\x00').strip()
+                    if fv_raw and len(fv_raw) == 8 and fv_raw.isdigit():
+                        y = int(fv_raw[0:4]); m = int(fv_raw[4:6]); d = int(fv_raw[6:8])
+                        fv = datetime.date(y, m, d)
+                    else:
+                        fv = None
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case '@': # Timestamp
+                    fb = rec[fld_index:fld_index+column[2]]
+                    fv = datetime.date(int(fb[:4]), int(fb[4:6]), int(fb[6:8]))
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case 'I': # Long
+                    fv, = struct.unpack('<i',rec[fld_index:fld_index+column[2]])
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case 'F': # Float
+                    fb = rec[fld_index:fld_index+column[2]].strip().strip(b'*')
+                    if fb:
+                        fv = float(fb)
+                        row_tuple += (fv,)
+                        fld_index += column[2]
+                    else:
+                        fv = None
+                case 'O': # Double
+                    fv, = struct.unpack('<d',rec[fld_index:fld_index+column[2]])
+                    row_tuple += (fv,)
+                    fld_index += column[2]
+                case c if c in ['M', 'B']: # Memo / Binary
+                    mids = rec[fld_index:fld_index+self.memo_block_number_size].decode('latin').strip()
+                    if mids != '':
+                        fv = self.readMemo(int(mids))
+                        if fv is not None:
+                            fv = fv.decode(self.encoding)
+                            fvs = len(fv)
+                            if fvs > self.metadata[column[5]-1][2]:  # Ενημερώνω το max memo size
+                                self.metadata[column[5]-1][2] = fvs
+                        else:
+                            fv = ''
+                    else:
+                        fv = ''
+                    row_tuple += (fv,)
+                    fld_index += self.memo_block_number_size
+                case _:
+                    print(f'Unknown data type: {column[1]}!')
+                    break
+        return row_tuple
+
+    def iterRecords(self, batch=1000):
+        """Yield the rows of a stream=True parser while reading its records."""
+        try:
+            if self.fp is None:
+                return
+            if self.start:
+                # Skip to the first record; plain files seek, archive streams read past
+                skip = self.start * self.nbr
+                if self.fp.seekable():
+                    self.fp.seek(self.nbh + skip)
+                else:
+                    while skip > 0:
+                        n = len(self.fp.read(min(skip, 1024 * 1024)))
+                        if n == 0:
+                            break
+                        skip -= n
+            stop = self.nrt if self.stop is None else min(self.stop, self.nrt)
+            rn = self.start
+            while rn < stop:
+                n = min(batch, stop - rn)
+                buf = self.fp.read(n * self.nbr)
+                if not buf:
+                    break
+                try:
+                    for pos in range(0, len(buf) - self.nbr + 1, self.nbr):
+                        rec = buf[pos:pos+self.nbr]
+                        deleted_flag = rec[0:1]
+                        if deleted_flag == b'*':
+                            self.nrt_deleted += 1
+                        if deleted_flag == b' ':
+                            yield self.parseRecord(rec)
+                except Exception as err:
+                    print(str(err))
+                    return
+                rn += n
+        finally:
+            self.close()
+
+    def close(self):
+        if self.fp is not None:
+            self.fp.close()
+            self.fp = None
+        if self.memofp is not None:
+            self.memofp.close()
+            self.memofp = None
+
     def readMemo(self, mid):
         if self.memofp is not None:
             self.memofp.seek(mid * self.memo_block_size)
@@ -245,4 +315,11 @@ class ParseDBFb:
                     bf = None
             else:
                 bf = None
-            return bf
\ No newline at end of file
+            return bf
+
+
+def dbf_record_count(path):
+    """Physical record count (deleted records included) from the DBF header."""
+    with open_stream(path) as fp:
+        head = fp.read(8)
+    return struct.unpack('<i', head[4:8])[0]
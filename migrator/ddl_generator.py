@@ -1,16 +1,75 @@
 from __future__ import annotations
-from typing import Dict, List
+import hashlib
+from typing import Dict, List, Tuple
 from .schema_mapper import clean_table_or_field_name, map_type_to_oracle
 
 
-def create_table_statement_for_oracle(meta: Dict, schema: str, target_table: str, db_type: str) -> str:
-	cols: List[str] = []
+def oracle_columns(meta: Dict, db_type: str) -> List[Tuple[str, str]]:
+	cols: List[Tuple[str, str]] = []
 	for col in meta["columns"]:
 		col_name = clean_table_or_field_name(col["name"])
 		col_type = map_type_to_oracle(col, db_type)
-		cols.append(f"\t{col_name} {col_type}")
-	cols.append("\tparser_error NVARCHAR2(2000)")
+		cols.append((col_name, col_type))
+	cols.append(("parser_error", "NVARCHAR2(2000)"))
+	return cols
+
+
+def create_table_statement_for_oracle(meta: Dict, schema: str, target_table: str, db_type: str) -> str:
+	cols = [f"\t{name} {col_type}" for name, col_type in oracle_columns(meta, db_type)]
 	cols_sql = ",\n".join(cols)
 	table_name = clean_table_or_field_name(target_table)
 	schema_name = clean_table_or_field_name(schema)
 	return f"CREATE TABLE {schema_name}.{table_name} (\n{cols_sql}\n)"
+
+
+PTT_PREFIX = "ORA$PTT_"
+
+
+def staging_table_name(target_table: str) -> str:
+	# Private temporary tables (18c+) must use the database's private_temp_table_prefix
+	name = PTT_PREFIX + clean_table_or_field_name(target_table)
+	if len(name) > 128:
+		name = name[:119] + "_" + hashlib.md5(name.encode("utf-8")).hexdigest()[:8].upper()
+	return name
+
+
+def create_staging_table_statement_for_oracle(meta: Dict, schema: str, target_table: str, db_type: str) -> str:
+	# A private temporary table's definition and rows belong to the loading
+	# session and are dropped when its transaction ends, so concurrent upserts
+	# of the same table never collide and nothing is left in the schema
+	cols = ",\n".join(f"\t{name} {col_type}" for name, col_type in oracle_columns(meta, db_type))
+	return f"CREATE PRIVATE TEMPORARY TABLE {staging_table_name(target_table)} (\n{cols}\n) ON COMMIT DROP DEFINITION"
+
+
+def merge_statement_for_oracle(meta: Dict, schema: str, target_table: str, key_columns: List[str], db_type: str) -> str:
+	schema_name = clean_table_or_field_name(schema)
+	table_name = clean_table_or_field_name(target_table)
+	keys = [clean_table_or_field_name(k) for k in key_columns]
+	columns = [name for name, _ in oracle_columns(meta, db_type)]
+	on = " AND ".join(f"t.{k} = s.{k}" for k in keys)
+	sql = f"MERGE INTO {schema_name}.{table_name} t\nUSING {staging_table_name(target_table)} s\nON ({on})"
+	updates = [c for c in columns if c not in keys]
+	if updates:
+		sql += "\nWHEN MATCHED THEN UPDATE SET " + ", ".join(f"t.{c} = s.{c}" for c in updates)
+	sql += "\nWHEN NOT MATCHED THEN INSERT (" + ", ".join(columns) + ") VALUES (" + ", ".join(f"s.{c}" for c in columns) + ")"
+	return sql
+
+
+def delete_missing_statement_for_oracle(schema: str, target_table: str, key_columns: List[str]) -> str:
+	schema_name = clean_table_or_field_name(schema)
+	table_name = clean_table_or_field_name(target_table)
+	match = " AND ".join(f"s.{k} = t.{k}" for k in (clean_table_or_field_name(k) for k in key_columns))
+	return (f"DELETE FROM {schema_name}.{table_name} t WHERE NOT EXISTS "
+		f"(SELECT 1 FROM {staging_table_name(target_table)} s WHERE {match})")
+
+
+def staging_null_keys_statement_for_oracle(staging: str, key_columns: List[str]) -> str:
+	keys = [clean_table_or_field_name(k) for k in key_columns]
+	return f"SELECT COUNT(*) FROM {staging} WHERE " + " OR ".join(f"{k} IS NULL" for k in keys)
+
+
+def staging_duplicate_keys_statement_for_oracle(staging: str, key_columns: List[str]) -> str:
+	keys = [clean_table_or_field_name(k) for k in key_columns]
+	cols = ", ".join(keys)
+	return (f"SELECT {cols}, COUNT(*) FROM {staging} WHERE " + " AND ".join(f"{k} IS NOT NULL" for k in keys)
+		+ f" GROUP BY {cols} HAVING COUNT(*) > 1")
@@ -0,0 +1,137 @@
+from __future__ import annotations
+import logging
+import queue
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+if TYPE_CHECKING:
+	import pandas as pd
+	from .loader import OracleLoader
+
+logger = logging.getLogger("migrator")
+
+DEFAULT_QUEUE_CHUNKS = 4
+DEFAULT_STALL_TIMEOUT = 300.0
+_POLL_SECONDS = 0.5
+_END = object()
+
+
+class TargetDetached(Exception):
+	pass
+
+
+class TargetFeed:
+	"""
+	One target of a fan-out load: a bounded chunk queue drained by a thread
+	running `OracleLoader.bulk_insert` on its own session.
+	"""
+	def __init__(self, name: str, loader: OracleLoader, schema: str, table: str, queue_chunks: int = DEFAULT_QUEUE_CHUNKS,
+			load: Optional[Callable[[Iterable[pd.DataFrame]], Tuple[int, int]]] = None):
+		self.name = name
+		self.loader = loader
+		self.schema = schema
+		self.table = table
+		# load(chunks) -> (rows_read, rows_loaded); defaults to a plain bulk insert
+		self.load = load or (lambda chunks: loader.bulk_insert(schema, table, chunks))
+		self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=queue_chunks)
+		self.detached = threading.Event()
+		self.error: Optional[str] = None
+		self.rows_read = 0
+		self.rows_inserted = 0
+		self.thread = threading.Thread(target=self._run, name=f"load-{name}", daemon=True)
+
+	def _chunks(self) -> Iterator[pd.DataFrame]:
+		while True:
+			try:
+				item = self.queue.get(timeout=_POLL_SECONDS)
+			except queue.Empty:
+				if self.detached.is_set():
+					raise TargetDetached(self.error or "detached")
+				continue
+			if item is _END:
+				return
+			yield item
+
+	def _run(self):
+		try:
+			# The load commits only after the last chunk, so a failed or
+			# detached target rolls back without touching the other targets
+			self.rows_read, self.rows_inserted = self.load(self._chunks())
+		except Exception as e:
+			if self.error is None:
+				self.error = str(e)
+			self.detached.set()
+			logger.error("Target %s failed on %s.%s: %s", self.name, self.schema, self.table, self.error)
+
+	@property
+	def alive(self) -> bool:
+		return not self.detached.is_set()
+
+	def detach(self, reason: str):
+		# Keep the load's own error if it failed first
+		if self.error is None:
+			self.error = reason
+		self.detached.set()
+
+	def put(self, item, stall_timeout: float) -> bool:
+		"""
+		Queue `item` for the load thread. Returns False without waiting further
+		once the target is detached (e.g. its load failed), or after detaching
+		it when the queue stays full for `stall_timeout` seconds.
+		"""
+		deadline = time.monotonic() + stall_timeout
+		while not self.detached.is_set():
+			try:
+				self.queue.put(item, timeout=max(0.0, min(_POLL_SECONDS, deadline - time.monotonic())))
+				return True
+			except queue.Full:
+				if time.monotonic() >= deadline:
+					self.detach(f"stalled for more than {stall_timeout:.0f}s")
+					logger.error("Target %s detached: %s", self.name, self.error)
+					return False
+		return False
+
+
+def fan_out(chunks: Iterable[pd.DataFrame], feeds: List[TargetFeed], stall_timeout: float = DEFAULT_STALL_TIMEOUT) -> List[Dict[str, Any]]:
+	"""
+	Feed every chunk of one source read to all targets concurrently.
+
+	A target whose queue stays full for `stall_timeout` seconds is detached
+	(its load rolls back) so a slow or hung session applies backpressure for
+	a bounded time only; the remaining targets keep loading.
+	"""
+	for feed in feeds:
+		feed.thread.start()
+	source_rows = 0
+	try:
+		for df in chunks:
+			if df is None or df.empty:
+				continue
+			source_rows += len(df)
+			live = [f for f in feeds if f.alive]
+			if not live:
+				break
+			for feed in live:
+				feed.put(df, stall_timeout)
+	except Exception as e:
+		# A source failure aborts every target
+		for feed in feeds:
+			if feed.alive:
+				feed.detach(f"source read failed: {e}")
+		raise
+	finally:
+		for feed in feeds:
+			if feed.alive:
+				feed.put(_END, stall_timeout)
+		for feed in feeds:
+			# A detached target may be stuck in a database call; don't wait on it forever
+			feed.thread.join(None if feed.alive else stall_timeout)
+
+	return [{
+		"target": f.name,
+		"table": f.table,
+		"source_rows": source_rows,
+		"rows_read": f.rows_read,
+		"rows_inserted": f.rows_inserted,
+		"error": f.error,
+	} for f in feeds]
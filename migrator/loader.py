@@ -1,12 +1,22 @@
 from __future__ import annotations
-from typing import Dict, Iterable, List, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Tuple
 import os
-import oracledb
-import pandas as pd
-import numpy as np
 from .schema_mapper import clean_table_or_field_name
+from .ddl_generator import (
+	create_staging_table_statement_for_oracle,
+	delete_missing_statement_for_oracle,
+	merge_statement_for_oracle,
+	oracle_columns,
+	staging_duplicate_keys_statement_for_oracle,
+	staging_null_keys_statement_for_oracle,
+	staging_table_name,
+)
 import datetime
-from pandas._libs.tslibs.nattype import NaTType
+if TYPE_CHECKING:
+	import pandas as pd
+
+# oracledb and pandas are imported where they are used so that --help and
+# --test-connection do not pay for the data stack
 ORACLE_DATE_FORMAT = "ALTER SESSION SET NLS_DATE_FORMAT = 'YYYY-MM-DD HH24:MI:SS'"
 class OracleLoader:
 	def __init__(self,  conn: str, username: str, password: str):
@@ -18,6 +28,7 @@ class OracleLoader:
 		self.password = password
 
 	def _connect(self):
+		import oracledb
 		return oracledb.connect(user=self.username, password=self.password, dsn=self.dsn)
 
 	def exec(self, sql: str):
@@ -53,46 +64,188 @@ class OracleLoader:
 		table = clean_table_or_field_name(table)
 		self.exec(f"TRUNCATE TABLE {schema}.{table}")
 
-	def bulk_insert(self, schema: str, table: str, dataframes: Iterable[pd.DataFrame]) -> Tuple[int, int]:
+	def bulk_insert(self, schema: str, table: str, dataframes: Iterable[pd.DataFrame],
+			before_commit: Optional[Callable[[], None]] = None) -> Tuple[int, int]:
 		schema = clean_table_or_field_name(schema)
 		table = clean_table_or_field_name(table)
-		rows_read = 0
-		rows_inserted = 0
 		with self._connect() as conn:
 			with conn.cursor() as cur:
 				# Ensure Oracle parses bound date/time strings consistently
 				cur.execute(ORACLE_DATE_FORMAT)
-				for df in dataframes:
-					if df is None or df.empty:
-						continue
-					rows_read += len(df)
-					# Prepare insert
-					columns = [clean_table_or_field_name(c) for c in df.columns]
-					placeholders = ",".join([":" + str(i+1) for i in range(len(columns))])
-					sql = f"INSERT INTO {schema}.{table} (" + ",".join(columns) + ") VALUES (" + placeholders + ")"
-					# Convert DataFrame rows to tuples; handle NaN -> None
-					records = [tuple(convert_value(v) for v in row)
-							for row in df.itertuples(index=False, name=None)
-					]
-					cur.executemany(sql, records)
-					rows_inserted += cur.rowcount if cur.rowcount is not None else len(records)
+				rows_read, rows_inserted = insert_frames(cur, f"{schema}.{table}", dataframes)
+				if before_commit is not None:
+					# May raise to abandon the load; closing the connection rolls it back
+					before_commit()
 				conn.commit()
 		return rows_read, rows_inserted
 
-def convert_value(v):
-    if v is pd.NaT or pd.isna(v):
-        return None
-    if isinstance(v, str) and v.strip() == "":
-        return None
-    if isinstance(v, (np.datetime64,)):
-        return pd.to_datetime(v).to_pydatetime()
-    if isinstance(v, pd.Timestamp):
-        return v.to_pydatetime()
-    if isinstance(v, (bytes, bytearray)):
-        try:
-            return bytes(v).decode('cp737')  # align with connectors
-        except UnicodeDecodeError:
-            return bytes(v).decode('cp1253', errors='replace')
-    return str(v)
+	def upsert(self, schema: str, table: str, meta: Dict, db_type: str, key_columns: List[str],
+			dataframes: Iterable[pd.DataFrame], delete_missing: bool = False) -> Tuple[int, int, int]:
+		with self._connect() as conn:
+			with conn.cursor() as cur:
+				cur.execute("ALTER SESSION SET NLS_LENGTH_SEMANTICS=CHAR")
+				cur.execute(ORACLE_DATE_FORMAT)
+			return upsert_frames(conn, OracleUpsertDialect(), schema, table, meta, db_type, key_columns, dataframes, delete_missing)
+
+
+def insert_frames(cur, qualified_table: str, dataframes: Iterable[pd.DataFrame], placeholder=None) -> Tuple[int, int]:
+	"""Array-insert every DataFrame into `qualified_table`; returns (rows_read, rows_inserted)."""
+	from .values import convert_value
+	placeholder = placeholder or (lambda i: f":{i + 1}")
+	rows_read = 0
+	rows_inserted = 0
+	for df in dataframes:
+		if df is None or df.empty:
+			continue
+		rows_read += len(df)
+		# Prepare insert
+		columns = [clean_table_or_field_name(c) for c in df.columns]
+		placeholders = ",".join([placeholder(i) for i in range(len(columns))])
+		sql = f"INSERT INTO {qualified_table} (" + ",".join(columns) + ") VALUES (" + placeholders + ")"
+		# Convert DataFrame rows to tuples; handle NaN -> None
+		records = [tuple(convert_value(v) for v in row)
+				for row in df.itertuples(index=False, name=None)
+		]
+		cur.executemany(sql, records)
+		rows_inserted += cur.rowcount if cur.rowcount is not None and cur.rowcount >= 0 else len(records)
+	return rows_read, rows_inserted
+
+
+class UpsertKeyError(ValueError):
+	"""The source has NULL or duplicate values in an upsert's key columns."""
+
+
+class OracleUpsertDialect:
+	"""Staging and MERGE statements for Oracle, built by ddl_generator."""
+	def placeholder(self, i: int) -> str:
+		return f":{i + 1}"
+
+	def staging_table(self, schema: str, table: str) -> str:
+		# Private temporary tables live in the session, not in the target schema
+		return staging_table_name(table)
+
+	def drop_staging(self, schema: str, table: str) -> List[str]:
+		# ON COMMIT DROP DEFINITION: Oracle drops it when the transaction ends
+		return []
+
+	def create_staging(self, meta: Dict, schema: str, table: str, db_type: str, key_columns: List[str]) -> List[str]:
+		return [create_staging_table_statement_for_oracle(meta, schema, table, db_type)]
+
+	def apply(self, meta: Dict, schema: str, table: str, key_columns: List[str], db_type: str) -> List[str]:
+		return [merge_statement_for_oracle(meta, schema, table, key_columns, db_type)]
+
+	def delete_missing(self, schema: str, table: str, key_columns: List[str]) -> str:
+		return delete_missing_statement_for_oracle(schema, table, key_columns)
+
+
+class SqliteUpsertDialect(OracleUpsertDialect):
+	"""
+	Embedded stand-in for local runs: a TEMP staging table and the MERGE split
+	into UPDATE ... FROM plus INSERT ... SELECT, over the same column list.
+	"""
+	def placeholder(self, i: int) -> str:
+		return "?"
+
+	def staging_table(self, schema: str, table: str) -> str:
+		return f"temp.{staging_table_name(table)}"
+
+	def drop_staging(self, schema: str, table: str) -> List[str]:
+		# TEMP tables last as long as the connection, which callers may reuse
+		return [f"DROP TABLE IF EXISTS {self.staging_table(schema, table)}"]
+
+	def create_staging(self, meta: Dict, schema: str, table: str, db_type: str, key_columns: List[str]) -> List[str]:
+		cols = ", ".join(name for name, _ in oracle_columns(meta, db_type))
+		target = f"{clean_table_or_field_name(schema)}.{clean_table_or_field_name(table)}"
+		staging = staging_table_name(table)
+		keys = ", ".join(clean_table_or_field_name(k) for k in key_columns)
+		# SQLite joins the staging table row by row, so it needs a key index
+		return [
+			f"CREATE TEMP TABLE {staging} AS SELECT {cols} FROM {target} WHERE 0",
+			f"CREATE INDEX temp.{staging}_KEY ON {staging} ({keys})",
+		]
+
+	def apply(self, meta: Dict, schema: str, table: str, key_columns: List[str], db_type: str) -> List[str]:
+		target = f"{clean_table_or_field_name(schema)}.{clean_table_or_field_name(table)}"
+		staging = self.staging_table(schema, table)
+		keys = [clean_table_or_field_name(k) for k in key_columns]
+		columns = [name for name, _ in oracle_columns(meta, db_type)]
+		match = " AND ".join(f"t.{k} = s.{k}" for k in keys)
+		statements = []
+		updates = [c for c in columns if c not in keys]
+		if updates:
+			statements.append(f"UPDATE {target} AS t SET " + ", ".join(f"{c} = s.{c}" for c in updates)
+				+ f" FROM {staging} AS s WHERE {match}")
+		statements.append(f"INSERT INTO {target} (" + ", ".join(columns) + ") SELECT " + ", ".join(f"s.{c}" for c in columns)
+			+ f" FROM {staging} AS s WHERE NOT EXISTS (SELECT 1 FROM {target} AS t WHERE {match})")
+		return statements
+
+	def delete_missing(self, schema: str, table: str, key_columns: List[str]) -> str:
+		target = f"{clean_table_or_field_name(schema)}.{clean_table_or_field_name(table)}"
+		match = " AND ".join(f"s.{k} = t.{k}" for k in (clean_table_or_field_name(k) for k in key_columns))
+		return f"DELETE FROM {target} AS t WHERE NOT EXISTS (SELECT 1 FROM {self.staging_table(schema, table)} AS s WHERE {match})"
+
+
+def check_staging_keys(cur, staging: str, table: str, key_columns: List[str], sample: int = 5):
+	"""
+	Raise UpsertKeyError if staged keys are NULL or repeated. A NULL key never
+	matches, so the row would be inserted again on every run (and removed by
+	delete_missing); a repeated key makes Oracle's MERGE fail with ORA-30926.
+	"""
+	problems = []
+	cur.execute(staging_null_keys_statement_for_oracle(staging, key_columns))
+	nulls = cur.fetchone()[0]
+	if nulls:
+		problems.append(f"{nulls} rows with a NULL key")
+	cur.execute(staging_duplicate_keys_statement_for_oracle(staging, key_columns))
+	dups = cur.fetchmany(sample)
+	if dups:
+		problems.append("duplicate keys " + ", ".join(
+			"(" + ", ".join(f"{k}={v}" for k, v in zip(key_columns, r[:-1])) + f": {r[-1]} rows)" for r in dups))
+	if problems:
+		raise UpsertKeyError(f"upsert of {table} rejected: " + "; ".join(problems))
+
 
+def upsert_frames(conn, dialect: OracleUpsertDialect, schema: str, table: str, meta: Dict, db_type: str,
+		key_columns: List[str], dataframes: Iterable[pd.DataFrame], delete_missing: bool = False) -> Tuple[int, int, int]:
+	"""
+	Load `dataframes` into a session-private staging table, then apply it to
+	`schema.table` with one set-based MERGE keyed on `key_columns` (and, with
+	`delete_missing`, one DELETE of target rows absent from the source).
+	Everything after the staging DDL runs in a single transaction.
+	Returns (rows_read, rows_merged, rows_deleted).
+	"""
+	if not key_columns:
+		raise ValueError(f"upsert of {table} requires key_columns")
+	staging = dialect.staging_table(schema, table)
+	cur = conn.cursor()
+	try:
+		for sql in dialect.drop_staging(schema, table):
+			cur.execute(sql)
+		for sql in dialect.create_staging(meta, schema, table, db_type, key_columns):
+			cur.execute(sql)
+		rows_read, _ = insert_frames(cur, staging, dataframes, dialect.placeholder)
+		check_staging_keys(cur, staging, table, key_columns)
+		rows_merged = 0
+		for sql in dialect.apply(meta, schema, table, key_columns, db_type):
+			cur.execute(sql)
+			rows_merged += max(cur.rowcount or 0, 0)
+		rows_deleted = 0
+		if delete_missing:
+			cur.execute(dialect.delete_missing(schema, table, key_columns))
+			rows_deleted = max(cur.rowcount or 0, 0)
+		conn.commit()
+	except Exception:
+		conn.rollback()
+		raise
+	finally:
+		for sql in dialect.drop_staging(schema, table):
+			cur.execute(sql)
+		cur.close()
+	return rows_read, rows_merged, rows_deleted
 
+def __getattr__(name):
+	# convert_value lives in .values; keep the old import path working lazily
+	if name == "convert_value":
+		from .values import convert_value
+		return convert_value
+	raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
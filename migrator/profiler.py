@@ -0,0 +1,135 @@
+from __future__ import annotations
+import os
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_INTERVAL = 0.01
+IDLE = "idle"
+# Leaf frames of a thread parked on a lock, condition or queue; sampling them
+# as work would rank every waiting helper thread above the real hot spots
+_BLOCKING = {
+	"threading.py:wait",
+	"threading.py:_wait_for_tstate_lock",
+	"queue.py:get",
+	"queue.py:put",
+	"selectors.py:select",
+}
+
+
+def _frame_name(code) -> str:
+	return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+	"""
+	Statistical profiler for migration stages.
+
+	A daemon thread wakes every `interval` seconds and records the Python stack
+	of every other thread, prefixed with the thread's current stage label
+	(`stage()`), or its thread name for helper threads such as fan-out loaders.
+	Nothing is hooked into the profiled code, so overhead is one stack walk per
+	thread per interval and stays low enough to leave on during real loads.
+	Samples are kept as collapsed stacks (`stage;file:func;... count`), the input
+	format of flamegraph.pl, speedscope and similar tools.
+
+	Threads whose innermost frame is a blocking wait (`_BLOCKING`) are counted
+	per stage in `idle` instead, so they do not show up as hot functions.
+	"""
+	def __init__(self, interval: float = DEFAULT_INTERVAL):
+		self.interval = interval
+		self.samples: Counter = Counter()
+		self.idle: Counter = Counter()
+		self._labels: Dict[int, str] = {}
+		self._stop = threading.Event()
+		self._thread: Optional[threading.Thread] = None
+
+	def start(self):
+		self._stop.clear()
+		self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+		self._thread.start()
+
+	def stop(self):
+		self._stop.set()
+		if self._thread is not None:
+			self._thread.join()
+			self._thread = None
+
+	def __enter__(self):
+		self.start()
+		return self
+
+	def __exit__(self, *exc):
+		self.stop()
+
+	@contextmanager
+	def stage(self, name: str) -> Iterator[None]:
+		ident = threading.get_ident()
+		previous = self._labels.get(ident)
+		self._labels[ident] = name
+		try:
+			yield
+		finally:
+			if previous is None:
+				self._labels.pop(ident, None)
+			else:
+				self._labels[ident] = previous
+
+	def _run(self):
+		own = threading.get_ident()
+		while not self._stop.wait(self.interval):
+			names = {t.ident: t.name for t in threading.enumerate()}
+			for ident, frame in sys._current_frames().items():
+				if ident == own:
+					continue
+				label = self._labels.get(ident) or names.get(ident, "thread")
+				if _frame_name(frame.f_code) in _BLOCKING:
+					self.idle[label] += 1
+					continue
+				stack = []
+				while frame is not None:
+					stack.append(_frame_name(frame.f_code))
+					frame = frame.f_back
+				stack.append(label)
+				self.samples[";".join(reversed(stack))] += 1
+
+	def write_collapsed(self, path: str):
+		os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+		with open(path, "w", encoding="utf-8") as f:
+			for stack, count in sorted(self.samples.items()):
+				f.write(f"{stack} {count}\n")
+			for label, count in sorted(self.idle.items()):
+				f.write(f"{label};{IDLE} {count}\n")
+
+	def stage_totals(self) -> Dict[str, int]:
+		totals: Counter = Counter()
+		for stack, count in self.samples.items():
+			totals[stack.split(";", 1)[0]] += count
+		return dict(totals)
+
+	def top(self, n: int = 10) -> List[Tuple[str, int, int]]:
+		"""Hottest functions as (name, self samples, inclusive samples), by self samples."""
+		own: Counter = Counter()
+		inclusive: Counter = Counter()
+		for stack, count in self.samples.items():
+			frames = stack.split(";")[1:]
+			if not frames:
+				continue
+			own[frames[-1]] += count
+			for name in set(frames):
+				inclusive[name] += count
+		return [(name, c, inclusive[name]) for name, c in own.most_common(n)]
+
+	def log_summary(self, logger, title: str, n: int = 10):
+		total = sum(self.samples.values())
+		idle = sum(self.idle.values())
+		if not total:
+			logger.info("Profile %s: no busy samples (%d idle)", title, idle)
+			return
+		stages = ", ".join(f"{s}={c * 100 / total:.1f}%" for s, c in sorted(self.stage_totals().items(), key=lambda x: -x[1]))
+		logger.info("Profile %s: %d busy samples every %.0f ms (%d idle, %.1f%%); stages: %s",
+			title, total, self.interval * 1000, idle, idle * 100 / (total + idle), stages)
+		for name, own, incl in self.top(n):
+			logger.info("  self=%5.1f%% total=%5.1f%%  %s", own * 100 / total, incl * 100 / total, name)
@@ -57,6 +57,8 @@ def map_type_to_oracle(field, type):
 		return map_dbf_type_to_oracle(field)
 	elif type == 'paradox':
 		return map_paradox_type_to_oracle(field)
+	elif type == 'sybase':
+		return map_sybase_type_to_oracle(field)
 	else:
 		raise ValueError(f"Unsupported mapper type: {type}")
 
@@ -116,3 +118,52 @@ def map_paradox_type_to_oracle(field: Dict[str, Any]) -> str:
         return "BLOB"
     # Fallback
     return "VARCHAR2(4000 CHAR)"
+
+
+# Sybase ASE catalog type names (lowercase); SQLite affinities are accepted too
+# so the embedded stand-in maps the same way
+def map_sybase_type_to_oracle(field: Dict[str, Any]) -> str:
+	t = (field.get("type") or "").lower()
+	length = field.get("length") or 0
+	precision = field.get("precision") or 0
+	scale = field.get("decimal_count") or 0
+	if t in ("char", "varchar", "nchar", "nvarchar", "unichar", "univarchar", "sysname", "longsysname", "character"):
+		if length and length <= 4000:
+			return f"VARCHAR2({length} CHAR)"
+		return "NCLOB"
+	if t in ("text", "unitext", "clob"):
+		return "NCLOB"
+	if t in ("bit", "boolean"):
+		return "NUMBER(1)"
+	if t == "tinyint":
+		return "NUMBER(3)"
+	if t in ("smallint", "unsigned smallint"):
+		return "NUMBER(5)"
+	if t in ("int", "intn", "unsigned int"):
+		return "NUMBER(10)"
+	if t in ("bigint", "unsigned bigint", "integer"):
+		# SQLite INTEGER is 64-bit
+		return "NUMBER(20)"
+	if t in ("numeric", "decimal", "numericn", "decimaln"):
+		p = min(max(precision or 38, 1), 38)
+		s = min(max(scale, 0), 127)
+		return f"NUMBER({p},{s})" if s > 0 else f"NUMBER({p})"
+	if t in ("money", "moneyn"):
+		return "NUMBER(19,4)"
+	if t == "smallmoney":
+		return "NUMBER(10,4)"
+	if t in ("float", "real", "double", "double precision", "floatn"):
+		return "NUMBER"
+	if t == "date":
+		return "DATE"
+	if t in ("datetime", "smalldatetime", "bigdatetime", "datetimn"):
+		return "TIMESTAMP"
+	if t == "timestamp":
+		# ASE timestamp is an 8-byte row version, not a point in time
+		return "RAW(8)"
+	if t in ("time", "bigtime"):
+		return "VARCHAR2(16)"
+	if t in ("binary", "varbinary", "image", "blob"):
+		return "BLOB"
+	# Fallback
+	return "VARCHAR2(4000 CHAR)"
@@ -0,0 +1,26 @@
+from __future__ import annotations
+import numpy as np
+import pandas as pd
+
+
+class Binary(bytes):
+    """Bytes a connector knows to be binary data (RAW/BLOB), bound as-is instead of decoded as text."""
+
+
+def convert_value(v):
+    if isinstance(v, Binary):
+        return bytes(v)
+    if v is pd.NaT or pd.isna(v):
+        return None
+    if isinstance(v, str) and v.strip() == "":
+        return None
+    if isinstance(v, (np.datetime64,)):
+        return pd.to_datetime(v).to_pydatetime()
+    if isinstance(v, pd.Timestamp):
+        return v.to_pydatetime()
+    if isinstance(v, (bytes, bytearray)):
+        try:
+            return bytes(v).decode('cp737')  # align with connectors
+        except UnicodeDecodeError:
+            return bytes(v).decode('cp1253', errors='replace')
+    return str(v)
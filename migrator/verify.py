@@ -0,0 +1,523 @@
+from __future__ import annotations
+import bisect
+import datetime
+import hashlib
+import heapq
+import pickle
+import re
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .connectors.base import describe_table
+from .connectors.factory import create_connector
+from .schema_mapper import clean_table_or_field_name, map_type_to_oracle
+from .values import convert_value
+
+# Verification compares a source table with its loaded target without pulling
+# the target rows back. Both sides render every column as the same normalized
+# text and hash its UTF-8 bytes (CHR(31)-prefixed) with MD5, keeping the first
+# 32 bits. Long text columns are hashed in PART_CHARS pieces so no single value
+# exceeds Oracle's RAW limit. The column digests are combined positionally into
+# a 32-bit row digest. Rows are grouped into key ranges; for each range the
+# client sums its row digests and the database computes the same sum with an
+# aggregate query. Only ranges whose (count, sum) differ are drilled into, by
+# re-reading the source for the rows of those ranges.
+
+SEPARATOR = "\x1f"
+DEFAULT_CHUNK_ROWS = 10000
+MAX_REPORTED_DIFFS = 100
+SORT_RUN_ROWS = 500000
+PART_CHARS = 500
+DIGEST_MOD = 2 ** 32
+_NUMBER_SCALE = re.compile(r"NUMBER\(\s*\d+\s*(?:,\s*(\d+)\s*)?\)")
+_TEXT_LENGTH = re.compile(r"^N?(?:VAR)?CHAR2?\(\s*(\d+)")
+
+
+def column_kind(oracle_type: str) -> Tuple[str, Optional[int]]:
+	"""
+	Classify a mapped Oracle type into (kind, size) for normalization: the
+	scale of numbers, the declared length of text.
+	"""
+	t = oracle_type.strip().upper()
+	if t.startswith("NUMBER"):
+		m = _NUMBER_SCALE.match(t)
+		scale = int(m.group(1) or 0) if m else None
+		return "number", scale
+	if t == "DATE":
+		return "date", None
+	if t.startswith("TIMESTAMP"):
+		return "timestamp", None
+	if t in ("CLOB", "NCLOB", "BLOB"):
+		return "lob", None
+	if t.startswith("RAW"):
+		return "raw", None
+	m = _TEXT_LENGTH.match(t)
+	return "text", int(m.group(1)) if m else None
+
+
+def _format_number(v: Any, scale: Optional[int]) -> Optional[str]:
+	try:
+		d = Decimal(str(v).strip())
+	except InvalidOperation:
+		return str(v)
+	if scale is not None:
+		d = d.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+	# Mirror Oracle TO_CHAR(n, 'TM9'): no trailing zeros, no leading zero
+	text = format(d.normalize(), "f")
+	if text in ("0", "-0"):
+		return "0"
+	if text.startswith("0."):
+		return text[1:]
+	if text.startswith("-0."):
+		return "-" + text[2:]
+	return text
+
+
+def _to_datetime(v: Any) -> Optional[datetime.datetime]:
+	if isinstance(v, datetime.datetime):
+		return v
+	if isinstance(v, datetime.date):
+		return datetime.datetime(v.year, v.month, v.day)
+	try:
+		return datetime.datetime.fromisoformat(str(v).strip())
+	except ValueError:
+		return None
+
+
+def normalize_value(v: Any, kind: str, scale: Optional[int] = None) -> Optional[str]:
+	"""Render a source value the way the database renders the stored value."""
+	if kind == "raw" and isinstance(v, (bytes, bytearray)):
+		return bytes(v).hex().upper()
+	v = convert_value(v) if not isinstance(v, (datetime.date, datetime.datetime)) else v
+	if v is None:
+		return None
+	if kind == "number":
+		return _format_number(v, scale)
+	if kind in ("date", "timestamp"):
+		dt = _to_datetime(v)
+		if dt is None:
+			return str(v)
+		if kind == "date":
+			return dt.strftime("%Y-%m-%d %H:%M:%S")
+		return dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+	return str(v)
+
+
+def _sort_value(v: Any, kind: str, scale: Optional[int]) -> Any:
+	"""Typed key value used both for client ordering and for range binds."""
+	v = convert_value(v) if not isinstance(v, (datetime.date, datetime.datetime)) else v
+	if v is None:
+		return None
+	if kind == "number":
+		try:
+			d = Decimal(str(v).strip())
+		except InvalidOperation:
+			return str(v)
+		if scale is not None:
+			d = d.quantize(Decimal(1).scaleb(-scale), rounding=ROUND_HALF_UP)
+		return d
+	if kind in ("date", "timestamp"):
+		return _to_datetime(v) or str(v)
+	return str(v)
+
+
+def text_digest(text: str) -> int:
+	return int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def part_count(kind: str, size: Optional[int]) -> int:
+	"""Number of PART_CHARS pieces a column is hashed in."""
+	if kind == "text" and size:
+		return max(1, -(-size // PART_CHARS))
+	return 1
+
+
+def part_weight(position: int) -> int:
+	# Odd and below 2**31, so weight * digest stays within a signed 64-bit integer
+	return (2654435761 * (position + 1)) % 2 ** 31 | 1
+
+
+def row_digest(fields: Iterable[Tuple[Optional[str], int]]) -> int:
+	"""Combine (normalized text, part count) per column into the row digest."""
+	total, position = 0, 0
+	for text, parts in fields:
+		text = text or ""
+		for j in range(parts):
+			piece = text[j * PART_CHARS:(j + 1) * PART_CHARS] if parts > 1 else text
+			total += text_digest(SEPARATOR + piece) * part_weight(position) % DIGEST_MOD
+			position += 1
+	return total % DIGEST_MOD
+
+
+def _new_chunk(lo: Optional[tuple]) -> Dict[str, Any]:
+	return {"lo": lo, "hi": None, "count": 0, "digest": 0}
+
+
+class SourceHasher:
+	"""Streams a source table as (sort key, normalized key, row digest) per row."""
+	def __init__(self, sources_cfg: Dict[str, Any], path: str, key_columns: List[str]):
+		self.conn = create_connector(sources_cfg)
+		self.path = path
+		self.key_columns = key_columns
+		self.kinds = column_kinds(describe_table(self.conn, path), sources_cfg.get("type"))
+		self.columns: Optional[List[Tuple[str, str, Optional[int]]]] = None
+
+	def rows(self) -> Iterator[Tuple[Optional[tuple], tuple, int]]:
+		"""The sort key is None for rows that go to the NULL-key chunk."""
+		kinds, key_columns = self.kinds, self.key_columns
+		for df in self.conn.stream_rows(self.path):
+			if df is None or df.empty:
+				continue
+			names = [clean_table_or_field_name(c) for c in df.columns]
+			if self.columns is None:
+				self.columns = []
+				for name in names:
+					kind, scale = kinds.get(name, ("text", None))
+					if kind != "lob":
+						self.columns.append((name, kind, scale))
+			positions = {name: i for i, name in enumerate(names)}
+			for row in df.itertuples(index=False, name=None):
+				fields = [(normalize_value(row[positions[n]], k, s), part_count(k, s)) for n, k, s in self.columns]
+				key_values = [(row[positions[k]], *kinds.get(k, ("text", None))) for k in key_columns]
+				norm_key = tuple(normalize_value(*kv) for kv in key_values)
+				sort_key: Optional[tuple] = tuple(_sort_value(*kv) for kv in key_values)
+				if not key_columns or any(v is None for v in sort_key):
+					sort_key = None
+				yield sort_key, norm_key, row_digest(fields)
+
+
+def _sorted(rows: Iterable[Tuple[tuple, int]], run_rows: int = SORT_RUN_ROWS) -> Iterator[Tuple[tuple, int]]:
+	"""Sort (key, digest) pairs in runs of `run_rows` spilled to temporary files."""
+	runs: List[Any] = []
+	buffer: List[Tuple[tuple, int]] = []
+
+	def spill():
+		buffer.sort(key=lambda r: r[0])
+		f = tempfile.TemporaryFile()
+		for r in buffer:
+			pickle.dump(r, f)
+		f.seek(0)
+		runs.append(f)
+		buffer.clear()
+
+	def read(f) -> Iterator[Tuple[tuple, int]]:
+		while True:
+			try:
+				yield pickle.load(f)
+			except EOFError:
+				return
+
+	try:
+		for r in rows:
+			buffer.append(r)
+			if len(buffer) >= run_rows:
+				spill()
+		if not runs:
+			buffer.sort(key=lambda r: r[0])
+			yield from buffer
+			return
+		if buffer:
+			spill()
+		yield from heapq.merge(*(read(f) for f in runs), key=lambda r: r[0])
+	finally:
+		for f in runs:
+			f.close()
+
+
+def hash_source_table(sources_cfg: Dict[str, Any], path: str, key_columns: List[str],
+		chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Dict[str, Any]:
+	"""
+	Read a source table and return its ordered chunk hashes.
+
+	Chunk i covers keys in (chunks[i-1].hi, chunks[i].hi]; the first chunk has
+	no lower bound and the last no upper bound, so target rows outside every
+	source key still land in a chunk. Rows with a NULL key go to `null_chunk`.
+	Only (lo, hi, count, digest) is kept per chunk; rows are sorted on disk, so
+	memory does not grow with the table. Runs in a worker process, so
+	arguments and result are plain data; the column types come from the source
+	header, read here rather than serially in the parent.
+	"""
+	hasher = SourceHasher(sources_cfg, path, key_columns)
+	null_chunk = _new_chunk(None)
+
+	def keyed() -> Iterator[Tuple[tuple, int]]:
+		for sort_key, _, digest in hasher.rows():
+			if sort_key is None:
+				null_chunk["count"] += 1
+				null_chunk["digest"] += digest
+			else:
+				yield sort_key, digest
+
+	chunks: List[Dict[str, Any]] = []
+	current = _new_chunk(None)
+	previous = None
+	for sort_key, digest in _sorted(keyed()):
+		# Only cut where the key changes so duplicates never straddle chunks
+		if current["count"] >= chunk_rows and sort_key != previous:
+			current["hi"] = previous
+			chunks.append(current)
+			current = _new_chunk(previous)
+		current["count"] += 1
+		current["digest"] += digest
+		previous = sort_key
+	chunks.append(current)
+	return {
+		"path": path,
+		"columns": hasher.columns or [],
+		"chunks": chunks,
+		"null_chunk": null_chunk,
+	}
+
+
+def source_chunk_rows(sources_cfg: Dict[str, Any], path: str, key_columns: List[str], chunks: List[Dict[str, Any]],
+		wanted: Iterable[Optional[int]]) -> Dict[Optional[int], List[Tuple[tuple, int]]]:
+	"""
+	Re-read the source and return (normalized key, digest) of the rows in the
+	`wanted` chunks, by chunk index (None for the NULL-key chunk). Used to
+	drill into mismatching chunks only.
+	"""
+	rows: Dict[Optional[int], List[Tuple[tuple, int]]] = {i: [] for i in wanted}
+	bounds = [c["hi"] for c in chunks[:-1]]
+	for sort_key, norm_key, digest in SourceHasher(sources_cfg, path, key_columns).rows():
+		i = None if sort_key is None else bisect.bisect_left(bounds, sort_key)
+		if i in rows:
+			rows[i].append((norm_key, digest))
+	return rows
+
+
+class OracleHashDialect:
+	"""SQL fragments computing the row digest inside Oracle."""
+	separator = "CHR(31)"
+
+	def prepare(self, conn):
+		pass
+
+	def placeholder(self, i: int) -> str:
+		return f":{i + 1}"
+
+	def bind(self, v: Any) -> Any:
+		return v
+
+	def column_expr(self, name: str, kind: str, scale: Optional[int]) -> str:
+		if kind == "number":
+			return f"TO_CHAR({name}, 'TM9')"
+		if kind == "date":
+			return f"TO_CHAR({name}, 'YYYY-MM-DD HH24:MI:SS')"
+		if kind == "timestamp":
+			return f"TO_CHAR({name}, 'YYYY-MM-DD HH24:MI:SS.FF6')"
+		if kind == "raw":
+			return f"RAWTOHEX({name})"
+		return name
+
+	def mod(self, expr: str, divisor: int) -> str:
+		return f"MOD({expr}, {divisor})"
+
+	def part_expr(self, expr: str) -> str:
+		# Hash UTF-8 bytes whatever the column's character set (VARCHAR2 in the
+		# database charset, NVARCHAR2 in AL16UTF16), exactly as text_digest does
+		raw = f"UTL_I18N.STRING_TO_RAW({self.separator} || {expr}, 'AL32UTF8')"
+		return f"TO_NUMBER(SUBSTR(RAWTOHEX(STANDARD_HASH({raw}, 'MD5')), 1, 8), 'XXXXXXXX')"
+
+
+class SqliteHashDialect(OracleHashDialect):
+	"""
+	Embedded stand-in: the same normalization registered as SQLite functions.
+	It runs the same range, part and combination SQL, but its column digests
+	come from the Python functions, so it cannot catch errors in the Oracle
+	column expressions.
+	"""
+	separator = "CHAR(31)"
+
+	def prepare(self, conn):
+		conn.create_function("mig_norm", 3, normalize_value, deterministic=True)
+		conn.create_function("mig_digest", 1, lambda s: text_digest(s or SEPARATOR), deterministic=True)
+
+	def placeholder(self, i: int) -> str:
+		return "?"
+
+	def bind(self, v: Any) -> Any:
+		if isinstance(v, Decimal):
+			return int(v) if v == v.to_integral_value() else float(v)
+		if isinstance(v, datetime.datetime):
+			# Match how convert_value writes dates: str(date) or str(datetime)
+			return str(v.date()) if v.time() == datetime.time() else str(v)
+		return v
+
+	def column_expr(self, name: str, kind: str, scale: Optional[int]) -> str:
+		return f"mig_norm({name}, '{kind}', {'NULL' if scale is None else scale})"
+
+	def mod(self, expr: str, divisor: int) -> str:
+		return f"(({expr}) % {divisor})"
+
+	def part_expr(self, expr: str) -> str:
+		return f"mig_digest({self.separator} || COALESCE({expr}, ''))"
+
+
+class TableVerifier:
+	def __init__(self, connect: Callable[[], Any], dialect: Optional[OracleHashDialect] = None):
+		self.connect = connect
+		self.dialect = dialect or OracleHashDialect()
+
+	def _row_sql(self, columns: List[Tuple[str, str, Optional[int]]]) -> str:
+		# One hashed part per column (several for long text), each reduced
+		# modulo 2**32 before summing so no intermediate value overflows
+		terms = []
+		for name, kind, size in columns:
+			expr = self.dialect.column_expr(name, kind, size)
+			parts = part_count(kind, size)
+			for j in range(parts):
+				piece = f"SUBSTR({expr}, {j * PART_CHARS + 1}, {PART_CHARS})" if parts > 1 else expr
+				terms.append(self.dialect.mod(f"{self.dialect.part_expr(piece)} * {part_weight(len(terms))}", DIGEST_MOD))
+		if not terms:
+			return "0"
+		return self.dialect.mod(" + ".join(terms), DIGEST_MOD)
+
+	def verify(self, schema: str, table: str, source: Dict[str, Any], key_columns: List[str],
+			source_rows: Callable[[List[Optional[int]]], Dict[Optional[int], List[Tuple[tuple, int]]]]) -> Dict[str, Any]:
+		"""
+		Compare `source` (from hash_source_table) with the target table.
+		`source_rows(indexes)` returns the source rows of the given chunks and
+		is called once, for the mismatching chunks that are drilled into.
+		"""
+		schema = clean_table_or_field_name(schema)
+		table = clean_table_or_field_name(table)
+		columns = source["columns"]
+		kinds = {n: (k, s) for n, k, s in columns}
+		digest_sql = self._row_sql(columns)
+		key_exprs = [self.dialect.column_expr(k, *kinds.get(k, ("text", None))) for k in key_columns]
+		result = {"table": table, "chunks": 0, "mismatched_chunks": 0, "source_rows": 0, "target_rows": 0, "diffs": []}
+		with self.connect() as conn:
+			self.dialect.prepare(conn)
+			cur = conn.cursor()
+			try:
+				# Without keys the whole table is a single NULL-key chunk
+				targets: List[Tuple[Optional[int], Dict[str, Any]]] = list(enumerate(source["chunks"])) if key_columns else []
+				targets.append((None, source["null_chunk"]))
+				mismatched = []
+				for index, chunk in targets:
+					where, binds = self._where(key_columns, chunk, index is None)
+					cur.execute(f"SELECT COUNT(*), SUM({digest_sql}) FROM {schema}.{table} WHERE {where}", binds)
+					count, digest = cur.fetchone()
+					count, digest = int(count or 0), int(digest or 0)
+					result["chunks"] += 1
+					result["source_rows"] += chunk["count"]
+					result["target_rows"] += count
+					if count == chunk["count"] and digest == chunk["digest"]:
+						continue
+					result["mismatched_chunks"] += 1
+					if not key_columns:
+						# Nothing to pair rows by; report the table as one changed range
+						result["diffs"].append({"key": (), "kind": "changed", "source_rows": chunk["count"], "target_rows": count})
+					elif len(mismatched) < MAX_REPORTED_DIFFS:
+						# Every mismatching chunk yields at least one diff
+						mismatched.append((index, where, binds))
+				rows = source_rows([index for index, _, _ in mismatched]) if mismatched else {}
+				for index, where, binds in mismatched:
+					if len(result["diffs"]) >= MAX_REPORTED_DIFFS:
+						break
+					cols = ", ".join(key_exprs + [digest_sql])
+					cur.execute(f"SELECT {cols} FROM {schema}.{table} WHERE {where}", binds)
+					target_rows = [(tuple(r[:-1]), int(r[-1])) for r in cur.fetchall()]
+					for diff in diff_rows(rows[index], target_rows):
+						if len(result["diffs"]) < MAX_REPORTED_DIFFS:
+							result["diffs"].append(diff)
+			finally:
+				cur.close()
+		result["status"] = "ok" if result["mismatched_chunks"] == 0 else "mismatch"
+		return result
+
+	def _where(self, keys: List[str], chunk: Dict[str, Any], is_null: bool) -> Tuple[str, List[Any]]:
+		if not keys:
+			return "1 = 1", []
+		if is_null:
+			return "(" + " OR ".join(f"{k} IS NULL" for k in keys) + ")", []
+		parts = [f"{k} IS NOT NULL" for k in keys]
+		binds: List[Any] = []
+		for op, bound in ((">", chunk["lo"]), ("<=", chunk["hi"])):
+			if bound is None:
+				continue
+			sql, values = _lex_clause(keys, op, bound, self.dialect, len(binds))
+			parts.append(sql)
+			binds.extend(values)
+		return " AND ".join(parts), binds
+
+
+def _lex_clause(keys: List[str], op: str, bound: tuple, dialect: OracleHashDialect, offset: int) -> Tuple[str, List[Any]]:
+	"""Lexicographic `keys op bound`, spelled out so no row-value syntax is needed."""
+	terms = []
+	binds: List[Any] = []
+	strict = ">" if op == ">" else "<"
+	branches = [(i, strict) for i in range(len(keys))]
+	if op == "<=":
+		branches.append((len(keys) - 1, "="))
+	for i, last_op in branches:
+		conds = []
+		for j in range(i + 1):
+			conds.append(f"{keys[j]} {'=' if j < i else last_op} {dialect.placeholder(offset + len(binds))}")
+			binds.append(dialect.bind(bound[j]))
+		terms.append("(" + " AND ".join(conds) + ")")
+	return "(" + " OR ".join(terms) + ")", binds
+
+
+def diff_rows(source_rows: List[Tuple[tuple, int]], target_rows: List[Tuple[tuple, int]]) -> List[Dict[str, Any]]:
+	"""Pair source and target row digests by key and describe the differences."""
+	src: Dict[tuple, Counter] = {}
+	tgt: Dict[tuple, Counter] = {}
+	for key, digest in source_rows:
+		src.setdefault(key, Counter())[digest] += 1
+	for key, digest in target_rows:
+		tgt.setdefault(key, Counter())[digest] += 1
+	diffs = []
+	for key in list(src) + [k for k in tgt if k not in src]:
+		s, t = src.get(key, Counter()), tgt.get(key, Counter())
+		if s == t:
+			continue
+		if not t:
+			kind = "missing_in_target"
+		elif not s:
+			kind = "unexpected_in_target"
+		else:
+			kind = "changed"
+		diffs.append({"key": key, "kind": kind, "source_rows": sum(s.values()), "target_rows": sum(t.values())})
+	return diffs
+
+
+def column_kinds(meta: Dict[str, Any], db_type: str) -> Dict[str, Tuple[str, Optional[int]]]:
+	kinds = {clean_table_or_field_name(c["name"]): column_kind(map_type_to_oracle(c, db_type)) for c in meta["columns"]}
+	kinds["PARSER_ERROR"] = column_kind("NVARCHAR2(2000)")
+	return kinds
+
+
+def verify_tables(jobs: List[Dict[str, Any]], sources_cfg: Dict[str, Any], workers: int = 1,
+		chunk_rows: int = DEFAULT_CHUNK_ROWS) -> List[Dict[str, Any]]:
+	"""
+	Verify several tables. Each job holds `path`, `target_table`,
+	`key_columns` and `targets`, a list of (name, TableVerifier, schema). Source
+	hashing runs once per table, in `workers` processes in parallel across
+	tables; each target is compared as soon as its table's hashes are ready.
+	"""
+	results = []
+
+	def compare(job, source):
+		def source_rows(wanted):
+			return source_chunk_rows(sources_cfg, job["path"], job["key_columns"], source["chunks"], wanted)
+		for name, verifier, schema in job["targets"]:
+			r = verifier.verify(schema, job["target_table"], source, job["key_columns"], source_rows)
+			r["target"] = name
+			results.append(r)
+
+	if workers <= 1:
+		for job in jobs:
+			compare(job, hash_source_table(sources_cfg, job["path"], job["key_columns"], chunk_rows))
+		return results
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		futures = {
+			pool.submit(hash_source_table, sources_cfg, job["path"], job["key_columns"], chunk_rows): job
+			for job in jobs
+		}
+		for fut in as_completed(futures):
+			compare(futures[fut], fut.result())
+	return results
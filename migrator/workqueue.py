@@ -0,0 +1,329 @@
+from __future__ import annotations
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger("migrator")
+
+DEFAULT_LEASE_SECONDS = 300.0
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_SECONDS = 2.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue_meta (
+	name TEXT PRIMARY KEY,
+	value TEXT
+);
+CREATE TABLE IF NOT EXISTS units (
+	id INTEGER PRIMARY KEY,
+	table_name TEXT NOT NULL,
+	path TEXT NOT NULL,
+	target TEXT NOT NULL,
+	schema_name TEXT NOT NULL,
+	start_rec INTEGER,
+	stop_rec INTEGER,
+	status TEXT NOT NULL DEFAULT 'pending',
+	worker TEXT,
+	lease_until REAL,
+	attempts INTEGER NOT NULL DEFAULT 0,
+	rows_read INTEGER NOT NULL DEFAULT 0,
+	rows_inserted INTEGER NOT NULL DEFAULT 0,
+	error TEXT,
+	updated REAL
+);
+CREATE INDEX IF NOT EXISTS units_status ON units (status, id);
+"""
+
+
+class WorkQueue:
+	"""
+	Work units of a distributed run, kept in a SQLite file on a shared filesystem.
+
+	A unit is one target table (or one record range of a large source file) for
+	one oracle target. Workers claim units under a lease and renew it while they
+	load; a unit whose lease runs out (its worker died or lost the share) is
+	handed to the next worker that asks. Every state change is a short
+	`BEGIN IMMEDIATE` transaction, so SQLite's file lock is the only
+	coordination needed and no broker runs anywhere.
+	"""
+	def __init__(self, path: str):
+		self.path = path
+
+	def _connect(self) -> sqlite3.Connection:
+		# Autocommit mode; transactions are opened explicitly where needed
+		db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+		db.row_factory = sqlite3.Row
+		return db
+
+	def _write(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+		db = self._connect()
+		try:
+			db.execute("BEGIN IMMEDIATE")
+			try:
+				result = fn(db)
+				db.execute("COMMIT")
+			except BaseException:
+				db.execute("ROLLBACK")
+				raise
+			return result
+		finally:
+			db.close()
+
+	def create(self, units: List[Dict[str, Any]], lease_seconds: float = DEFAULT_LEASE_SECONDS,
+			max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+		"""Initialise the queue with `units` and mark it ready for workers."""
+		def fn(db):
+			if db.execute("SELECT COUNT(*) FROM units").fetchone()[0]:
+				raise ValueError(f"Work queue {self.path} already holds units; remove it to start a new run")
+			db.executemany(
+				"INSERT INTO units (table_name, path, target, schema_name, start_rec, stop_rec, updated) VALUES (?, ?, ?, ?, ?, ?, ?)",
+				[(u["table"], u["path"], u["target"], u["schema"], u.get("start"), u.get("stop"), time.time()) for u in units],
+			)
+			db.executemany("INSERT OR REPLACE INTO queue_meta (name, value) VALUES (?, ?)", [
+				("lease_seconds", str(float(lease_seconds))),
+				("max_attempts", str(int(max_attempts))),
+				("state", "ready"),
+			])
+		db = self._connect()
+		try:
+			db.executescript(_SCHEMA)
+		finally:
+			db.close()
+		self._write(fn)
+
+	def settings(self) -> Optional[Dict[str, str]]:
+		"""Queue settings, or None while the coordinator has not finished enqueueing."""
+		if not os.path.exists(self.path):
+			return None
+		db = self._connect()
+		try:
+			try:
+				rows = db.execute("SELECT name, value FROM queue_meta").fetchall()
+			except sqlite3.OperationalError:
+				return None
+		finally:
+			db.close()
+		meta = {r["name"]: r["value"] for r in rows}
+		return meta if meta.get("state") == "ready" else None
+
+	def claim(self, worker: str) -> Optional[Dict[str, Any]]:
+		"""
+		Lease the next pending unit, or one whose lease expired, to `worker`.
+		Expired units that used up their attempts are failed instead.
+		"""
+		def fn(db):
+			meta = {r["name"]: r["value"] for r in db.execute("SELECT name, value FROM queue_meta")}
+			lease, max_attempts = float(meta["lease_seconds"]), int(meta["max_attempts"])
+			now = time.time()
+			db.execute(
+				"UPDATE units SET status = 'failed', error = 'lease expired on ' || worker, updated = ? "
+				"WHERE status = 'leased' AND lease_until < ? AND attempts >= ?",
+				(now, now, max_attempts),
+			)
+			row = db.execute(
+				"SELECT * FROM units WHERE status = 'pending' OR (status = 'leased' AND lease_until < ?) ORDER BY id LIMIT 1",
+				(now,),
+			).fetchone()
+			if row is None:
+				return None
+			if row["status"] == "leased":
+				logger.warning("Reclaiming unit %d from %s: lease expired", row["id"], row["worker"])
+			db.execute(
+				"UPDATE units SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1, error = NULL, updated = ? "
+				"WHERE id = ?",
+				(worker, now + lease, now, row["id"]),
+			)
+			unit = dict(row)
+			unit.update(worker=worker, attempts=row["attempts"] + 1, lease_seconds=lease)
+			return unit
+		return self._write(fn)
+
+	def renew(self, unit_id: int, worker: str, lease_seconds: float) -> bool:
+		"""Extend the lease; False if `worker` no longer holds the unit."""
+		def fn(db):
+			now = time.time()
+			cur = db.execute(
+				"UPDATE units SET lease_until = ?, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+				(now + lease_seconds, now, unit_id, worker),
+			)
+			return cur.rowcount == 1
+		return self._write(fn)
+
+	def complete(self, unit_id: int, worker: str, rows_read: int, rows_inserted: int) -> bool:
+		def fn(db):
+			cur = db.execute(
+				"UPDATE units SET status = 'done', rows_read = ?, rows_inserted = ?, lease_until = NULL, updated = ? "
+				"WHERE id = ? AND worker = ? AND status = 'leased'",
+				(rows_read, rows_inserted, time.time(), unit_id, worker),
+			)
+			return cur.rowcount == 1
+		return self._write(fn)
+
+	def fail(self, unit_id: int, worker: str, error: str):
+		"""Record a failed attempt; the unit goes back to pending until it runs out of attempts."""
+		def fn(db):
+			max_attempts = int(db.execute("SELECT value FROM queue_meta WHERE name = 'max_attempts'").fetchone()[0])
+			db.execute(
+				"UPDATE units SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+				"error = ?, lease_until = NULL, updated = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+				(max_attempts, error, time.time(), unit_id, worker),
+			)
+		self._write(fn)
+
+	def remaining(self) -> int:
+		db = self._connect()
+		try:
+			return db.execute("SELECT COUNT(*) FROM units WHERE status IN ('pending', 'leased')").fetchone()[0]
+		finally:
+			db.close()
+
+	def units(self) -> List[Dict[str, Any]]:
+		db = self._connect()
+		try:
+			return [dict(r) for r in db.execute("SELECT * FROM units ORDER BY id")]
+		finally:
+			db.close()
+
+	def report(self) -> List[Dict[str, Any]]:
+		"""
+		Merge unit results per table and target into `migrate_table` report rows.
+		A table that still has unfinished or failed units carries an error.
+		"""
+		merged: Dict[Tuple[str, str], Dict[str, Any]] = {}
+		for u in self.units():
+			r = merged.setdefault((u["table_name"], u["target"]), {
+				"target": u["target"],
+				"table": u["table_name"],
+				"rows_read": 0,
+				"rows_inserted": 0,
+				"units": 0,
+				"workers": set(),
+				"errors": [],
+			})
+			r["units"] += 1
+			r["rows_read"] += u["rows_read"]
+			r["rows_inserted"] += u["rows_inserted"]
+			if u["worker"]:
+				r["workers"].add(u["worker"])
+			if u["status"] == "failed":
+				r["errors"].append(f"unit {u['id']}: {u['error']}")
+			elif u["status"] != "done":
+				r["errors"].append(f"unit {u['id']}: {u['status']}")
+		report = []
+		for r in merged.values():
+			errors = r.pop("errors")
+			r["workers"] = sorted(r["workers"])
+			r["error"] = "; ".join(errors) if errors else None
+			report.append(r)
+		return report
+
+
+class LeaseLost(Exception):
+	pass
+
+
+class Lease:
+	"""
+	A worker's hold on one unit. A thread renews it every third of the lease
+	period while the unit loads; `guard()` and `confirm()` let the load stop
+	and roll back once the unit may have been handed to another worker.
+	"""
+	def __init__(self, queue: WorkQueue, unit: Dict[str, Any]):
+		self.queue = queue
+		self.unit = unit
+		self.seconds = unit["lease_seconds"]
+		self.expires = time.time() + self.seconds
+		self.lost = False
+		self._stop = threading.Event()
+		self._thread = threading.Thread(target=self._run, name=f"lease-{unit['id']}", daemon=True)
+
+	def _renew(self) -> bool:
+		started = time.time()
+		if not self.queue.renew(self.unit["id"], self.unit["worker"], self.seconds):
+			self.lost = True
+			logger.warning("Lost lease on unit %d", self.unit["id"])
+			return False
+		self.expires = started + self.seconds
+		return True
+
+	def _run(self):
+		while not self._stop.wait(self.seconds / 3):
+			try:
+				if not self._renew():
+					return
+			except sqlite3.Error as e:
+				# A slow shared filesystem; keep trying until the lease runs out
+				logger.warning("Could not renew lease on unit %d: %s", self.unit["id"], e)
+
+	def check(self):
+		if self.lost or time.time() >= self.expires:
+			raise LeaseLost(f"lease on unit {self.unit['id']} lost; rolling back")
+
+	def guard(self, chunks: Iterable[Any]) -> Iterator[Any]:
+		"""Pass chunks through, raising LeaseLost as soon as the lease is gone."""
+		for chunk in chunks:
+			self.check()
+			yield chunk
+		self.check()
+
+	def confirm(self):
+		"""Renew once more right before commit; raises LeaseLost if the unit is no longer ours."""
+		self.check()
+		if not self._renew():
+			raise LeaseLost(f"lease on unit {self.unit['id']} lost; rolling back")
+
+	def __enter__(self):
+		self._thread.start()
+		return self
+
+	def __exit__(self, *exc):
+		self._stop.set()
+		self._thread.join()
+
+
+def run_worker(queue: WorkQueue, worker: str, process: Callable[[Dict[str, Any], Lease], Tuple[int, int]],
+		poll_seconds: float = DEFAULT_POLL_SECONDS, wait_seconds: Optional[float] = None) -> int:
+	"""
+	Claim and process units until none is pending or leased; returns the
+	number of units this worker completed. `process(unit, lease)` loads one
+	unit in a single transaction and returns (rows_read, rows_inserted); it
+	should read through `lease.guard()` and call `lease.confirm()` just before
+	committing, so a worker whose unit was reclaimed rolls back. Waits for the
+	coordinator to publish the queue, at most `wait_seconds` when given.
+	"""
+	started = time.time()
+	while queue.settings() is None:
+		if wait_seconds is not None and time.time() - started > wait_seconds:
+			raise TimeoutError(f"Work queue {queue.path} was not published within {wait_seconds:.0f}s")
+		time.sleep(poll_seconds)
+
+	done = 0
+	while True:
+		unit = queue.claim(worker)
+		if unit is None:
+			if not queue.remaining():
+				return done
+			# Everything left is leased by other workers; wait in case a lease expires
+			time.sleep(poll_seconds)
+			continue
+		logger.info("Worker %s claimed unit %d: %s -> %s records %s-%s (attempt %d)", worker, unit["id"],
+			unit["table_name"], unit["target"], unit["start_rec"], unit["stop_rec"], unit["attempts"])
+		try:
+			with Lease(queue, unit) as lease:
+				rows_read, rows_inserted = process(unit, lease)
+		except LeaseLost as e:
+			# The unit belongs to another worker now; nothing to record
+			logger.warning("Unit %d abandoned on %s: %s", unit["id"], worker, e)
+			continue
+		except Exception as e:
+			logger.error("Unit %d failed on %s: %s", unit["id"], worker, e)
+			queue.fail(unit["id"], worker, str(e))
+			continue
+		if queue.complete(unit["id"], worker, rows_read, rows_inserted):
+			done += 1
+			logger.info("Unit %d done: read=%d inserted=%d", unit["id"], rows_read, rows_inserted)
+		else:
+			logger.warning("Unit %d finished after its lease was reclaimed; its rows may be loaded twice", unit["id"])